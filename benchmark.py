@@ -0,0 +1,236 @@
+'''
+Created on Oct 18, 2026
+
+Benchmarks for the construction of the models.
+@author: stefan
+'''
+
+from ciphers import (simon, speck, present, gift, skinny, skinny128,
+                     rectangle, twine, lblock, midori, midori128)
+from cryptanalysis import search
+from config import PATH_STP, PATH_CRYPTOMINISAT, PATH_WEIGHT_ENCODINGS
+from parser import stpcommands
+
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+import os
+import sys
+import time
+import yaml
+
+
+# Cipher instances and parameters used for the benchmarks
+BENCHMARK_CIPHERS = [
+    (simon.SimonCipher(), {"rounds" : 13, "wordsize" : 16}),
+    (speck.SpeckCipher(), {"rounds" : 9, "wordsize" : 16}),
+    (present.PresentCipher(), {"rounds" : 31, "wordsize" : 64}),
+    (gift.GiftCipher(), {"rounds" : 28, "wordsize" : 64}),
+    (gift.GiftCipher(), {"rounds" : 40, "wordsize" : 128}),
+    (skinny.SkinnyCipher(), {"rounds" : 36, "blocksize" : 64}),
+    (skinny128.Skinny128Cipher(), {"rounds" : 20, "blocksize" : 128}),
+    (rectangle.RectangleCipher(), {"rounds" : 25, "wordsize" : 16}),
+    (twine.TwineCipher(), {"rounds" : 36, "wordsize" : 64}),
+    (lblock.LBlockCipher(), {"rounds" : 32, "wordsize" : 32}),
+    (midori.MidoriCipher(), {"rounds" : 16, "wordsize" : 64}),
+    (midori128.Midori128Cipher(), {"rounds" : 20, "wordsize" : 128})]
+
+# Example files used to compare the weight encodings
+WEIGHT_ENCODING_EXAMPLES = {
+    "simon" : ["examples/simon/simon6rounds.yaml",
+               "examples/simon/simon8rounds.yaml",
+               "examples/simon/simon10rounds.yaml"],
+    "speck" : ["examples/speck/speck5rounds.yaml",
+               "examples/speck/speck7rounds.yaml"],
+    "present" : ["examples/present/present5rounds.yaml",
+                 "examples/present/present8rounds.yaml"]}
+
+# Differentials with many characteristics used to measure the counting
+COUNTING_EXAMPLES = [
+    (simon.SimonCipher(), {"rounds" : 4, "wordsize" : 16, "sweight" : 16,
+                           "fixedVariables" : {"x0" : "0x0040",
+                                               "y0" : "0x0000"}}),
+    (simon.SimonCipher(), {"rounds" : 5, "wordsize" : 16, "sweight" : 20,
+                           "fixedVariables" : {"x0" : "0x0040",
+                                               "y0" : "0x0000"}})]
+
+CIPHERS = {"simon" : simon.SimonCipher(),
+           "speck" : speck.SpeckCipher(),
+           "present" : present.PresentCipher()}
+
+
+def getParameters(cipher_parameters):
+    """
+    Returns the full parameter set for constructing a model.
+    """
+    parameters = {"wordsize" : 16,
+                  "blocksize" : 64,
+                  "sweight" : 0,
+                  "iterative" : False,
+                  "fixedVariables" : {},
+                  "blockedCharacteristics" : []}
+    parameters.update(cipher_parameters)
+    return parameters
+
+
+def benchmarkModelGeneration(repetitions):
+    """
+    Measures the time to write the STP model for each cipher.
+    """
+    print("Cipher\t\tRounds\tSize (MB)\tMemory (s)\tFile (s)")
+    print("-" * 66)
+    for cipher, cipher_parameters in BENCHMARK_CIPHERS:
+        parameters = getParameters(cipher_parameters)
+        stp_file = "tmp/benchmark_{}.stp".format(cipher.name)
+
+        # The first run fills the S-box cache
+        cipher.createSTP(stp_file, parameters)
+
+        # Without a filename the model is only constructed in memory
+        start_time = time.time()
+        for _ in range(repetitions):
+            cipher.createSTP(None, parameters)
+        memory_time = (time.time() - start_time) / repetitions
+
+        start_time = time.time()
+        for _ in range(repetitions):
+            cipher.createSTP(stp_file, parameters)
+        file_time = (time.time() - start_time) / repetitions
+
+        print("{}\t{}\t{:.2f}\t\t{:.3f}\t\t{:.3f}".format(
+            cipher.name.ljust(12), parameters["rounds"],
+            os.path.getsize(stp_file) / 2**20, memory_time, file_time))
+        sys.stdout.flush()
+        os.remove(stp_file)
+    return
+
+
+def loadExample(filename):
+    """
+    Returns the parameters of an example input file.
+    """
+    with open(filename, 'r') as input_file:
+        doc = yaml.safe_load(input_file)
+    parameters = getParameters(doc)
+    fixed_vars = {}
+    for variable in doc.get("fixedVariables") or []:
+        fixed_vars.update(variable)
+    parameters["fixedVariables"] = fixed_vars
+    return parameters
+
+
+def benchmarkWeightEncoding(repetitions):
+    """
+    Compares the solving time of STP for each weight encoding on the example
+    files. The examples are solved at their weight (SAT) and one below (UNSAT).
+    The faster of bvplus and tree becomes the default in cryptosmt.py.
+    """
+    if not os.path.exists(PATH_STP):
+        print("ERROR: Could not find STP binary, please check config.py")
+        return
+
+    fastest = {}
+    print("Example\t\t\t\tEncoding\tSAT (s)\t\tUNSAT (s)")
+    print("-" * 70)
+    for family, examples in sorted(WEIGHT_ENCODING_EXAMPLES.items()):
+        totals = dict.fromkeys(stpcommands.WEIGHT_ENCODINGS, 0.0)
+        for example in examples:
+            parameters = loadExample(example)
+            cipher = CIPHERS[family]
+            weight = parameters["sweight"]
+            for encoding in stpcommands.WEIGHT_ENCODINGS:
+                stpcommands.setWeightEncoding(encoding)
+                times = []
+                for sweight in [weight, weight - 1]:
+                    parameters["sweight"] = sweight
+                    model = search.generateModel(cipher, parameters)
+                    start_time = time.time()
+                    for _ in range(repetitions):
+                        search.solveSTP(model, cache=False)
+                    times.append((time.time() - start_time) / repetitions)
+                totals[encoding] += sum(times)
+                print("{}\t{}\t\t{:.3f}\t\t{:.3f}".format(
+                    os.path.basename(example).ljust(24), encoding, times[0],
+                    times[1]))
+                sys.stdout.flush()
+        print("Fastest encoding for {}: {}".format(
+            family, min(totals, key=totals.get)))
+        fastest[family] = min(stpcommands.DEFAULT_WEIGHT_ENCODINGS,
+                              key=totals.get)
+        print("Default encoding for {}: {}\n".format(family, fastest[family]))
+    stpcommands.setWeightEncoding("bvplus")
+
+    # cryptosmt.py uses these encodings unless --weightencoding is given,
+    # only encodings which work in every mode are stored
+    stpcommands.storeWeightEncodings(fastest)
+    print("Stored the fastest encodings in {}".format(PATH_WEIGHT_ENCODINGS))
+    return
+
+
+def benchmarkCounting(repetitions):
+    """
+    Measures the throughput of counting the characteristics of a weight with
+    CryptoMiniSat as in mode 4, with and without logging the output.
+    """
+    if not os.path.exists(PATH_CRYPTOMINISAT):
+        print("ERROR: Could not find CRYPTOMINISAT binary, please check "
+              "config.py")
+        return
+
+    print("Cipher\t\tRounds\tWeight\tLog\tSolutions\tTime (s)\tSolutions/s")
+    print("-" * 82)
+    for cipher, cipher_parameters in COUNTING_EXAMPLES:
+        parameters = getParameters(cipher_parameters)
+        log_filename = "tmp/benchmark_{}.log".format(cipher.name)
+        model = search.generateModel(cipher, parameters)
+        for log in [False, True]:
+            start_time = time.time()
+            for _ in range(repetitions):
+                sat_process = search.startSATsolver(model)
+                if log:
+                    with open(log_filename, "wb") as log_file:
+                        solutions = search.countSolutionsSATsolver(
+                            sat_process, log_file)
+                    os.remove(log_filename)
+                else:
+                    solutions = search.countSolutionsSATsolver(sat_process)
+            count_time = (time.time() - start_time) / repetitions
+            print("{}\t{}\t{}\t{}\t{}\t\t{:.3f}\t\t{:.0f}".format(
+                cipher.name.ljust(12), parameters["rounds"],
+                parameters["sweight"], "yes" if log else "no", solutions,
+                count_time, solutions / count_time))
+            sys.stdout.flush()
+    return
+
+
+def main():
+    """
+    Parse the arguments and run the requested benchmark.
+    """
+    parser = ArgumentParser(description="Benchmarks for CryptoSMT.",
+                            formatter_class=RawTextHelpFormatter)
+    parser.add_argument('--benchmark', nargs=1, default=["modelgeneration"],
+                        choices=["modelgeneration", "weightencoding",
+                                 "counting"], help=
+                        "modelgeneration = time to write the STP models\n"
+                        "weightencoding = solving time for each weight "
+                        "encoding\n"
+                        "counting = throughput of counting the "
+                        "characteristics\n")
+    parser.add_argument('--repetitions', nargs=1, type=int, default=[3],
+                        help="Number of repetitions for each measurement.")
+
+    args = parser.parse_args()
+
+    if not os.path.exists("./tmp/"):
+        os.makedirs("./tmp/")
+
+    if args.benchmark[0] == "modelgeneration":
+        benchmarkModelGeneration(args.repetitions[0])
+    elif args.benchmark[0] == "weightencoding":
+        benchmarkWeightEncoding(args.repetitions[0])
+    elif args.benchmark[0] == "counting":
+        benchmarkCounting(args.repetitions[0])
+
+
+if __name__ == '__main__':
+    main()
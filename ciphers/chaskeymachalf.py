@@ -56,7 +56,7 @@ class ChasKeyMacHalf(AbstractCipher):
             self.rot_v3_down = parameters["rotationconstants"][5]
 
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             stp_file.write("% Input File for STP\n% ChasKeyMac w={} rounds={}"
                            "\n\n\n".format(wordsize, rounds))
 
@@ -12,6 +12,12 @@ class AbstractCipher(object, metaclass=ABCMeta):
     Abstract Class for Ciphers
     """
 
+    # The minimal weight over fewer rounds bounds the weight of the first
+    # and the last rounds of a characteristic, see
+    # stpcommands.setRoundBounds. This does not hold if the key difference
+    # can cancel the state difference in the first rounds.
+    round_bounds_valid = True
+
     @abstractmethod
     def createSTP(self, filename, cipherParameters):
         """
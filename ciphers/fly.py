@@ -36,7 +36,7 @@ class FlyCipher(AbstractCipher):
             print("Only wordsize of 64-bit supported.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% FLY w={}"
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
@@ -129,7 +129,7 @@ class FlyCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w, 8*i + 2),
                          "{0}[{1}:{1}]".format(w, 8*i + 1),
                          "{0}[{1}:{1}]".format(w, 8*i + 0)]
-            command += stpcommands.add8bitSbox(fly_sbox, variables)
+            stp_file.write(stpcommands.add8bitSbox(fly_sbox, variables))
 
         stp_file.write(command)
         return
@@ -36,7 +36,7 @@ class Fly4BitCipher(AbstractCipher):
             print("Only wordsize of 64-bit supported.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% FLY w={}"
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
@@ -102,7 +102,7 @@ class Fly4BitCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w1, 4*i + 2),
                          "{0}[{1}:{1}]".format(w1, 4*i + 1),
                          "{0}[{1}:{1}]".format(w1, 4*i + 0)]
-            command += stpcommands.add4bitSbox(fly_sbox, variables)
+            stp_file.write(stpcommands.add4bitSbox(fly_sbox, variables))
 
             #sbox2 = "BVXOR({0}[{2}:{3}], {1}[{4}:{5}])".format(s_in, sbox1, 8*i+3, 8*i+0, 4*i + 3, 4*i + 0)
             #sbox3 = "BVXOR({0}[{2}:{3}], {1}[{4}:{5}])".format(s_in, sbox1, 8*i+7, 8*i+4, 4*i + 3, 4*i + 0)
@@ -124,7 +124,7 @@ class Fly4BitCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w2, 4*i + 2),
                          "{0}[{1}:{1}]".format(w2, 4*i + 1),
                          "{0}[{1}:{1}]".format(w2, 4*i + 0)]
-            command += stpcommands.add4bitSbox(fly_sbox, variables)
+            stp_file.write(stpcommands.add4bitSbox(fly_sbox, variables))
 
 
             #Sbox 3 - right
@@ -140,7 +140,7 @@ class Fly4BitCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w3, 4*i + 2),
                          "{0}[{1}:{1}]".format(w3, 4*i + 1),
                          "{0}[{1}:{1}]".format(w3, 4*i + 0)]
-            command += stpcommands.add4bitSbox(fly_sbox, variables)
+            stp_file.write(stpcommands.add4bitSbox(fly_sbox, variables))
             """
 
         #Permutation Layer
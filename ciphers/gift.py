@@ -15,6 +15,7 @@ class GiftCipher(AbstractCipher):
     """
 
     name = "gift"
+    sbox = [0x1, 0xa, 0x4, 0xc, 0x6, 0xf, 0x3, 0x9, 0x2, 0xd, 0xb, 0x7, 0x5, 0x0, 0x8, 0xe]
 
     def getFormatString(self):
         """
@@ -22,6 +23,23 @@ class GiftCipher(AbstractCipher):
         """
         return ['SC', 'PB', 'w']
 
+    def getSPNDescription(self, parameters):
+        """
+        Returns the S-box, the bits of the state for each S-box starting
+        with the most significant bit and the bit permutation, which maps
+        bit i of the S-box layer to bit permutation[i] of the next state.
+        """
+        wordsize = parameters["wordsize"]
+        if wordsize not in [64, 128]:
+            print("Only wordsize 64/128 bit supported!")
+            exit(1)
+
+        sbox_bits = [[4*i + 3, 4*i + 2, 4*i + 1, 4*i]
+                     for i in range(wordsize // 4)]
+        permutation = [4*(i // 16) + (wordsize // 4)*((3*((i % 16) // 4) + i % 4) % 4)
+                       + i % 4 for i in range(wordsize)]
+        return self.sbox, sbox_bits, permutation
+
     def createSTP(self, stp_filename, parameters):
         """
         Creates an STP file to find a characteristic for GIFT with
@@ -32,7 +50,7 @@ class GiftCipher(AbstractCipher):
         rounds = parameters["rounds"]
         weight = parameters["sweight"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% GIFT w={}"
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
@@ -289,8 +307,6 @@ class GiftCipher(AbstractCipher):
 
 
         # Substitution Layer
-        gift_sbox = [0x1, 0xa, 0x4, 0xc, 0x6, 0xf, 0x3, 0x9, 0x2, 0xd, 0xb, 0x7, 0x5, 0x0, 0x8, 0xe]
-
         nrOfSboxes = 0
         if wordsize == 64:
             nrOfSboxes = 16
@@ -313,7 +329,7 @@ class GiftCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w, 4*i + 2),
                          "{0}[{1}:{1}]".format(w, 4*i + 1),
                          "{0}[{1}:{1}]".format(w, 4*i + 0)]
-            command += stpcommands.add4bitSbox(gift_sbox, variables)
+            stp_file.write(stpcommands.add4bitSbox(self.sbox, variables))
 
         stp_file.write(command)
         return
@@ -53,7 +53,7 @@ class GimliCipher(AbstractCipher):
             self.f = parameters["rotationconstants"][2]
 
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             stp_file.write("% Input File for STP\n% Gimli w={}"
                            "rounds={}\n\n\n".format(wordsize, rounds))
 
@@ -33,7 +33,7 @@ class LBlockCipher(AbstractCipher):
         rounds = parameters["rounds"]
         weight = parameters["sweight"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% LBlock w={}"
                       "rounds={}\n\n\n".format(wordsize,rounds))
             stp_file.write(header)
@@ -43,7 +43,7 @@ class MantisCipher(AbstractCipher):
             print("Mantis only supports a multiple of 2 as the number of rounds.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Mantis w={}"
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
@@ -122,7 +122,7 @@ class MantisCipher(AbstractCipher):
                        0x8, 0x9, 0x1, 0x5, 0x0, 0x2, 0x4, 0x6]
 
         for sbox in range(16):
-            command += stpcommands.add4bitSboxNibbles(mantis_sbox, sb_in[sbox], sr[sbox], wn[sbox])
+            stp_file.write(stpcommands.add4bitSboxNibbles(mantis_sbox, sb_in[sbox], sr[sbox], wn[sbox]))
 
         # Permute Cells
 
@@ -160,7 +160,7 @@ class MantisCipher(AbstractCipher):
                        0x8, 0x9, 0x1, 0x5, 0x0, 0x2, 0x4, 0x6]
 
         for sbox in range(16):
-            command += stpcommands.add4bitSboxNibbles(mantis_sbox, sb_in[sbox], m_in[sbox], wn[sbox])
+            stp_file.write(stpcommands.add4bitSboxNibbles(mantis_sbox, sb_in[sbox], m_in[sbox], wn[sbox]))
 
         # MixColumns
         for col in range(4):
@@ -172,7 +172,7 @@ class MantisCipher(AbstractCipher):
 
         # SubBytes
         for sbox in range(16):
-            command += stpcommands.add4bitSboxNibbles(mantis_sbox, m_out[sbox], sb_out[sbox], wn2[sbox])
+            stp_file.write(stpcommands.add4bitSboxNibbles(mantis_sbox, m_out[sbox], sb_out[sbox], wn2[sbox]))
 
         stp_file.write(command)
         return
@@ -203,7 +203,7 @@ class MantisCipher(AbstractCipher):
                        0x8, 0x9, 0x1, 0x5, 0x0, 0x2, 0x4, 0x6]
 
         for sbox in range(16):
-            command += stpcommands.add4bitSboxNibbles(mantis_sbox, mc[sbox], sb_out[sbox], wn[sbox])
+            stp_file.write(stpcommands.add4bitSboxNibbles(mantis_sbox, mc[sbox], sb_out[sbox], wn[sbox]))
 
         stp_file.write(command)
         return
@@ -36,7 +36,7 @@ class Midori128Cipher(AbstractCipher):
             print("Only wordsize of 128-bit supported.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% MIDORI w={}"
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
@@ -155,8 +155,8 @@ class Midori128Cipher(AbstractCipher):
                                    "{0}[{1}:{1}]".format(w, 8*i + 5),
                                    "{0}[{1}:{1}]".format(w, 8*i + 4)]
 
-                command += stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox1)
-                command += stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox2)
+                stp_file.write(stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox1))
+                stp_file.write(stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox2))
             elif i % 4 == 1:
                 #SSB1
                 #y[7,6,5,4,3,2,1,0]=x[3,0,5,6,7,4,1,2]
@@ -187,8 +187,8 @@ class Midori128Cipher(AbstractCipher):
                                    "{0}[{1}:{1}]".format(w, 8*i + 5),
                                    "{0}[{1}:{1}]".format(w, 8*i + 4)]
 
-                command += stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox1)
-                command += stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox2)
+                stp_file.write(stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox1))
+                stp_file.write(stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox2))
             elif i % 4 == 2:
                 #SSB2
                 #y[7,6,5,4,3,2,1,0]=x[6,3,0,1,2,7,4,5]
@@ -219,8 +219,8 @@ class Midori128Cipher(AbstractCipher):
                                    "{0}[{1}:{1}]".format(w, 8*i + 5),
                                    "{0}[{1}:{1}]".format(w, 8*i + 4)]
 
-                command += stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox1)
-                command += stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox2)
+                stp_file.write(stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox1))
+                stp_file.write(stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox2))
             elif i % 4 == 3:
                 #SSB3
                 #y[7,6,5,4,3,2,1,0]=x[5,2,3,4,1,6,7,0]
@@ -251,8 +251,8 @@ class Midori128Cipher(AbstractCipher):
                                    "{0}[{1}:{1}]".format(w, 8*i + 5),
                                    "{0}[{1}:{1}]".format(w, 8*i + 4)]
 
-                command += stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox1)
-                command += stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox2)
+                stp_file.write(stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox1))
+                stp_file.write(stpcommands.add4bitSbox(midori_sbox_sb1, variables_sbox2))
             else: 
                 #something is seriously wrong!
                 print("Error with modulo!")
@@ -34,7 +34,7 @@ class NoekeonCipher(AbstractCipher):
         rounds = parameters["rounds"]
         weight = parameters["sweight"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% NOEKEON w={}"
                       "rounds={}\n\n\n".format(wordsize,rounds))
             stp_file.write(header)
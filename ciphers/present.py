@@ -15,6 +15,7 @@ class PresentCipher(AbstractCipher):
     """
 
     name = "present"
+    sbox = [0xc, 5, 6, 0xb, 9, 0, 0xa, 0xd, 3, 0xe, 0xf, 8, 4, 7, 1, 2]
 
     def getFormatString(self):
         """
@@ -22,6 +23,16 @@ class PresentCipher(AbstractCipher):
         """
         return ['S', 'P', 'w']
 
+    def getSPNDescription(self, parameters):
+        """
+        Returns the S-box, the bits of the state for each S-box starting
+        with the most significant bit and the bit permutation, which maps
+        bit i of the S-box layer to bit permutation[i] of the next state.
+        """
+        sbox_bits = [[4*i + 3, 4*i + 2, 4*i + 1, 4*i] for i in range(16)]
+        permutation = [16*(i % 4) + i // 4 for i in range(64)]
+        return self.sbox, sbox_bits, permutation
+
     def createSTP(self, stp_filename, parameters):
         """
         Creates an STP file to find a characteristic for PRESENT with
@@ -36,7 +47,7 @@ class PresentCipher(AbstractCipher):
             print("Only wordsize of 64-bit supported.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% PRESENT w={}"
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
@@ -90,7 +101,6 @@ class PresentCipher(AbstractCipher):
             command += "ASSERT({0}[{1}:{1}] = {2}[{3}:{3}]);\n".format(p, i*4+3, s_out, i+48)
 
         # Substitution Layer
-        present_sbox = [0xc, 5, 6, 0xb, 9, 0, 0xa, 0xd, 3, 0xe, 0xf, 8, 4, 7, 1, 2]
         for i in range(16):
             variables = ["{0}[{1}:{1}]".format(s_in, 4*i + 3),
                          "{0}[{1}:{1}]".format(s_in, 4*i + 2),
@@ -104,7 +114,7 @@ class PresentCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w, 4*i + 2),
                          "{0}[{1}:{1}]".format(w, 4*i + 1),
                          "{0}[{1}:{1}]".format(w, 4*i + 0)]
-            command += stpcommands.add4bitSbox(present_sbox, variables)
+            stp_file.write(stpcommands.add4bitSbox(self.sbox, variables))
 
 
         stp_file.write(command)
@@ -43,7 +43,7 @@ class PrinceCipher(AbstractCipher):
             print("PRINCE only supports a multiple of 2 as the number of rounds.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Prince w={}"
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
@@ -122,7 +122,7 @@ class PrinceCipher(AbstractCipher):
                        0x6, 0x7, 0x8, 0x0, 0xe, 0x5, 0xd, 0x4]
 
         for sbox in range(16):
-            command += stpcommands.add4bitSboxNibbles(prince_sbox, sb_in[sbox], mc[sbox], wn[sbox])
+            stp_file.write(stpcommands.add4bitSboxNibbles(prince_sbox, sb_in[sbox], mc[sbox], wn[sbox]))
 
         # MixColumns
         for col in range(4):
@@ -153,7 +153,7 @@ class PrinceCipher(AbstractCipher):
                        0x6, 0x7, 0x8, 0x0, 0xe, 0x5, 0xd, 0x4]
 
         for sbox in range(16):
-            command += stpcommands.add4bitSboxNibbles(prince_sbox, sb_in[sbox], mc[sbox], wn[sbox])
+            stp_file.write(stpcommands.add4bitSboxNibbles(prince_sbox, sb_in[sbox], mc[sbox], wn[sbox]))
 
         # MixColumns
         for col in range(4):
@@ -169,7 +169,7 @@ class PrinceCipher(AbstractCipher):
                            0xa, 0x6, 0x4, 0x0, 0x5, 0xe, 0xc, 0x1]
 
         for sbox in range(16):
-            command += stpcommands.add4bitSboxNibbles(prince_sbox_inv, sr[sbox], sb_out[sbox], wn2[sbox])
+            stp_file.write(stpcommands.add4bitSboxNibbles(prince_sbox_inv, sr[sbox], sb_out[sbox], wn2[sbox]))
 
         stp_file.write(command)
         return
@@ -199,7 +199,7 @@ class PrinceCipher(AbstractCipher):
                            0xa, 0x6, 0x4, 0x0, 0x5, 0xe, 0xc, 0x1]
 
         for sbox in range(16):
-            command += stpcommands.add4bitSboxNibbles(prince_sbox_inv, mc[sbox], sb_out[sbox], wn[sbox])
+            stp_file.write(stpcommands.add4bitSboxNibbles(prince_sbox_inv, mc[sbox], sb_out[sbox], wn[sbox]))
 
         stp_file.write(command)
         return
@@ -15,6 +15,7 @@ class RectangleCipher(AbstractCipher):
     """
 
     name = "rectangle"
+    sbox = [0x6, 0x5, 0xC, 0xA, 0x1, 0xE, 0x7, 0x9, 0xB, 0x0, 0x3, 0xD, 0x8, 0xF, 0x4, 0x2]
 
     def getFormatString(self):
         """
@@ -22,6 +23,19 @@ class RectangleCipher(AbstractCipher):
         """
         return ['SC', 'SR', 'w']
 
+    def getSPNDescription(self, parameters):
+        """
+        Returns the S-box, the bits of the state for each S-box starting
+        with the most significant bit and the bit permutation, which maps
+        bit i of the S-box layer to bit permutation[i] of the next state.
+        """
+        # SubColumn on the columns and ShiftRow by 0, 1, 12 and 13
+        sbox_bits = [[i + 48, i + 32, i + 16, i] for i in range(16)]
+        rotations = [0, 1, 12, 13]
+        permutation = [16*(i // 16) + (i + rotations[i // 16]) % 16
+                       for i in range(64)]
+        return self.sbox, sbox_bits, permutation
+
     def createSTP(self, stp_filename, parameters):
         """
         Creates an STP file to find a characteristic for RECTANGLE with
@@ -33,7 +47,7 @@ class RectangleCipher(AbstractCipher):
         rounds = parameters["rounds"]
         weight = parameters["sweight"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Rectangle w={}"
                       "rounds={}\n\n\n".format(blocksize, rounds))
             stp_file.write(header)
@@ -80,7 +94,6 @@ class RectangleCipher(AbstractCipher):
         command = ""
 
         #SubColumn
-        rectangle_sbox = [0x6, 0x5, 0xC, 0xA, 0x1, 0xE, 0x7, 0x9, 0xB, 0x0, 0x3, 0xD, 0x8, 0xF, 0x4, 0x2]
         for i in range(16):
             variables = ["{0}[{1}:{1}]".format(sc_in, i + 48),
                          "{0}[{1}:{1}]".format(sc_in, i + 32),
@@ -94,7 +107,7 @@ class RectangleCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w, i + 32),
                          "{0}[{1}:{1}]".format(w, i + 16),
                          "{0}[{1}:{1}]".format(w, i + 0)]
-            command += stpcommands.add4bitSbox(rectangle_sbox, variables)
+            stp_file.write(stpcommands.add4bitSbox(self.sbox, variables))
 
         #ShiftRows
         # row 0 <<< 0
@@ -19,6 +19,7 @@ class SimonRkCipher(AbstractCipher):
     """
 
     name = "simonrk"
+    round_bounds_valid = False
     rot_alpha = 8
     rot_beta = 1
     rot_gamma = 2
@@ -46,7 +47,7 @@ class SimonRkCipher(AbstractCipher):
             self.rot_beta = parameters["rotationconstants"][1]
             self.rot_gamma = parameters["rotationconstants"][2]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Simon w={} alpha={} beta={}"
                       " gamma={} rounds={}\n\n\n".format(wordsize,
                                                          self.rot_alpha,
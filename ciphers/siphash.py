@@ -36,7 +36,7 @@ class SipHashCipher(AbstractCipher):
         
         self.num_messages = parameters["nummessages"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             stp_file.write("% Input File for STP\n% Siphash w={} "
                            "rounds={}\n\n\n".format(wordsize, rounds))
 
@@ -37,7 +37,7 @@ class SkinnyCipher(AbstractCipher):
             print("Only blocksize of 64-bit supported.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Skinny w={}"
                       "rounds={}\n\n\n".format(blocksize, rounds))
             stp_file.write(header)
@@ -101,7 +101,7 @@ class SkinnyCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w, 4*i + 2),
                          "{0}[{1}:{1}]".format(w, 4*i + 1),
                          "{0}[{1}:{1}]".format(w, 4*i + 0)]
-            command += stpcommands.add4bitSbox(skinny_sbox, variables)
+            stp_file.write(stpcommands.add4bitSbox(skinny_sbox, variables))
 
         # ShiftRows
         command += "ASSERT({0}[15:0] = {1}[15:0]);\n".format(sr, mc)
@@ -53,7 +53,7 @@ class Skinny128Cipher(AbstractCipher):
             print("Only blocksize of 128-bit supported.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Skinny w={}"
                       "rounds={}\n\n\n".format(blocksize, rounds))
             stp_file.write(header)
@@ -133,8 +133,7 @@ class Skinny128Cipher(AbstractCipher):
         command += "BVXOR({0}[127:96], {1}[127:96]) = {1}[31:0]".format(mc, sc_out);
         command += ");\n"
 
-        # TODO: correctly compute weight
-        # For now just take the Hamming weight
+        # SubBytes
         skinny_sbox = [0x65 ,0x4c ,0x6a ,0x42 ,0x4b ,0x63 ,0x43 ,0x6b ,0x55 ,0x75 ,0x5a ,0x7a ,0x53 ,0x73 ,0x5b ,0x7b ,
                        0x35 ,0x8c ,0x3a ,0x81 ,0x89 ,0x33 ,0x80 ,0x3b ,0x95 ,0x25 ,0x98 ,0x2a ,0x90 ,0x23 ,0x99 ,0x2b ,
                        0xe5 ,0xcc ,0xe8 ,0xc1 ,0xc9 ,0xe0 ,0xc0 ,0xe9 ,0xd5 ,0xf5 ,0xd8 ,0xf8 ,0xd0 ,0xf0 ,0xd9 ,0xf9 ,
@@ -177,7 +176,7 @@ class Skinny128Cipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w, 8*i + 2),
                          "{0}[{1}:{1}]".format(w, 8*i + 1),
                          "{0}[{1}:{1}]".format(w, 8*i + 0)]
-            command += stpcommands.add8bitSbox(skinny_sbox, variables)
+            stp_file.write(stpcommands.add8bitSbox(skinny_sbox, variables))
 
         stp_file.write(command)
         return
@@ -15,6 +15,7 @@ class SkinnyRKCipher(AbstractCipher):
     """
 
     name = "skinnyrk"
+    round_bounds_valid = False
     sbox = [0xc, 6, 9, 0, 1, 0xa, 2, 0xb, 3, 8, 5, 0xd, 4, 0xe, 7, 0xf]
 
     def getFormatString(self):
@@ -51,7 +52,7 @@ class SkinnyRKCipher(AbstractCipher):
         nrOfTK = (keysize + tweaksize) // 64
         #print(nrOfTK)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Skinny w={}"
                       "rounds={}\n\n\n".format(blocksize, rounds))
             stp_file.write(header)
@@ -244,7 +245,7 @@ class SkinnyRKCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w, 4*i + 2),
                          "{0}[{1}:{1}]".format(w, 4*i + 1),
                          "{0}[{1}:{1}]".format(w, 4*i + 0)]
-            command += stpcommands.add4bitSbox(skinny_sbox, variables)
+            stp_file.write(stpcommands.add4bitSbox(skinny_sbox, variables))
 
 
         stp_file.write(command)
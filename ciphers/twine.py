@@ -31,7 +31,7 @@ class TwineCipher(AbstractCipher):
         rounds = parameters["rounds"]
         weight = parameters["sweight"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.STPWriter(stp_filename) as stp_file:
             header = ("% Input File for STP\n% TWINE w={}"
                       "rounds={}\n\n\n".format(wordsize,rounds))
             stp_file.write(header)
@@ -95,7 +95,7 @@ class TwineCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w, 4*i + 2),
                          "{0}[{1}:{1}]".format(w, 4*i + 1),
                          "{0}[{1}:{1}]".format(w, 4*i + 0)]
-            command += stpcommands.add4bitSbox(twine_sbox, variables)
+            stp_file.write(stpcommands.add4bitSbox(twine_sbox, variables))
 
         #Feistel structure
         command += "ASSERT({0}[3:0] = {1}[3:0]);\n".format(x_in, p)
@@ -8,7 +8,26 @@ Created on Dec 10, 2014
 PATH_STP = "../stp/build/stp"
 PATH_CRYPTOMINISAT = "../cryptominisat/build/cryptominisat5"
 PATH_BOOLECTOR = "../boolector/boolector/boolector"
+# Shared library of an incremental SAT solver implementing IPASIR
+PATH_IPASIR = "../cryptominisat/build/lib/libipasircryptominisat5.so"
+# Approximate model counter used to estimate the probability of differentials
+PATH_APPROXMC = "../approxmc/build/approxmc"
 #Maximum weight for characteristics to search for
 MAX_WEIGHT = 1000
 #Maximum number of characteristics to search for a differential
 MAX_CHARACTERISTICS = 10000000
+#Directory to cache the CNF encodings of S-boxes
+PATH_SBOX_CACHE = "./tmp/sboxcache/"
+#Fastest weight encoding of each cipher measured by benchmark.py
+PATH_WEIGHT_ENCODINGS = "./tmp/weightencodings.txt"
+#Directory to cache the minimal weights of rotation constants
+PATH_CONSTANTS_CACHE = "./tmp/constantscache/"
+#Directory to record which backend of the portfolio won the races
+PATH_PORTFOLIO_CACHE = "./tmp/portfoliocache/"
+#Races a backend has to win before it is used without racing
+PORTFOLIO_MIN_WINS = 3
+#Directory to cache the results of STP and Boolector for each model
+PATH_RESULT_CACHE = "./tmp/resultcache/"
+#Size of the result cache in bytes before the least recently used results
+#are removed, 0 disables the cache
+RESULT_CACHE_SIZE = 256 * 1024 * 1024
@@ -0,0 +1,102 @@
+'''
+Created on Oct 18, 2026
+
+Interface to incremental SAT solvers which implement IPASIR, the API used in
+the incremental track of the SAT competition. The solver is loaded from a
+shared library, see PATH_IPASIR in config.py.
+@author: stefan
+'''
+
+import ctypes
+import time
+
+# Callback which returns a non-zero value if the solver should stop
+TERMINATE_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p)
+
+
+class IpasirSolver(object):
+    """
+    An incremental SAT solver. Clauses are kept between calls of solve()
+    and can be extended, assumptions only hold for a single call.
+    """
+
+    def __init__(self, library_path):
+        self.library = ctypes.CDLL(library_path)
+        self.library.ipasir_signature.restype = ctypes.c_char_p
+        self.library.ipasir_init.restype = ctypes.c_void_p
+        self.library.ipasir_release.argtypes = [ctypes.c_void_p]
+        self.library.ipasir_add.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        self.library.ipasir_assume.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        self.library.ipasir_solve.argtypes = [ctypes.c_void_p]
+        self.library.ipasir_val.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        self.library.ipasir_set_terminate.argtypes = [ctypes.c_void_p,
+                                                      ctypes.c_void_p,
+                                                      TERMINATE_CALLBACK]
+        self.solver = self.library.ipasir_init()
+
+        # The callback is kept, as the solver only holds a pointer to it
+        self.deadline = None
+        self.terminate = TERMINATE_CALLBACK(self.reachedDeadline)
+        self.library.ipasir_set_terminate(self.solver, None, self.terminate)
+        return
+
+    def reachedDeadline(self, data):
+        """
+        Called by the solver, returns 1 if it should stop.
+        """
+        if self.deadline is not None and time.time() >= self.deadline:
+            return 1
+        return 0
+
+    def setTimeout(self, timeout):
+        """
+        Interrupts the following calls of solve() after timeout seconds, or
+        never if timeout is None.
+        """
+        self.deadline = None if timeout is None else time.time() + timeout
+        return
+
+    def getSignature(self):
+        """
+        Returns the name and version of the solver.
+        """
+        return self.library.ipasir_signature().decode("utf-8")
+
+    def addClause(self, literals):
+        """
+        Adds a clause given as list of DIMACS literals.
+        """
+        for literal in literals:
+            self.library.ipasir_add(self.solver, literal)
+        self.library.ipasir_add(self.solver, 0)
+        return
+
+    def solve(self, assumptions=[]):
+        """
+        Returns True if the clauses are satisfiable under the assumptions,
+        False if not and None if the solver was interrupted.
+        """
+        for literal in assumptions:
+            self.library.ipasir_assume(self.solver, literal)
+        result = self.library.ipasir_solve(self.solver)
+        if result == 10:
+            return True
+        if result == 20:
+            return False
+        return None
+
+    def getAssignment(self, num_vars):
+        """
+        Returns the set of variables which are true in the last solution.
+        """
+        return {var for var in range(1, num_vars + 1)
+                if self.library.ipasir_val(self.solver, var) > 0}
+
+    def release(self):
+        """
+        Frees the solver.
+        """
+        if self.solver is not None:
+            self.library.ipasir_release(self.solver)
+            self.solver = None
+        return
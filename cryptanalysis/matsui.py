@@ -1,92 +1,255 @@
 '''
 Created on Mar 22, 2017
 
+Matsui's branch-and-bound search for the differential trail with the
+minimal weight of an SPN cipher.
 @author: ralph
 '''
 
-# imports go here
+from cryptanalysis import sboxtables
+from parser import sboxcnf
 
-class MatsuisAlgorithm(object):
 
-    DDT = None
+class MatsuisAlgorithm(object):
+    """
+    Finds differential trails with the minimal weight for an SPN cipher
+    given by its S-box, the state bits of each S-box and the bit
+    permutation of the linear layer.
+
+    The state is kept as an integer, where the bits of S-box j are stored at
+    bits [n*j + n - 1 : n*j]. The transitions and their weights are the
+    same as in the SAT model, see sboxcnf.WEIGHT_ROUNDING.
+    """
+
+    def __init__(self, sbox, sbox_bits, permutation):
+        n = len(sbox).bit_length() - 1
+        self.sbox_size = n
+        self.num_sboxes = len(sbox_bits)
+        self.sbox_bits = sbox_bits
+
+        # Position of each state bit of the cipher in the S-box ordered state
+        self.positions = [0] * len(permutation)
+        for j, bits in enumerate(sbox_bits):
+            for k, bit in enumerate(bits):
+                self.positions[bit] = n*j + n - 1 - k
+
+        # Weights[a][b] of the transitions and the transitions
+        # (output difference, weight) of each input difference, sorted by
+        # increasing weight
+        rounding = sboxcnf.WEIGHT_ROUNDING[sboxcnf.getDefaultEncoding(sbox)]
+        self.weights = sboxtables.getDifferentialWeights(sbox,
+                                                         rounding=rounding)
+        self.transitions = sboxtables.getSortedTransitions(sbox,
+                                                           rounding=rounding)
+        self.min_weights = [row[0][1] for row in self.transitions]
+        self.min_active_weight = min(self.min_weights[1:])
+
+        # In the first round the input difference is free, each output
+        # difference is reached with the best input difference
+        best_inputs = {}
+        for a, row in enumerate(self.weights):
+            for b, weight in enumerate(row):
+                if weight is None or b == 0:
+                    continue
+                if b not in best_inputs or weight < best_inputs[b][1]:
+                    best_inputs[b] = (a, weight)
+        self.first_round = sorted(((b, weight, a) for b, (a, weight)
+                                   in best_inputs.items()),
+                                  key=lambda entry: entry[1])
+
+        # Input difference of the next round for each output difference of
+        # each S-box
+        self.diffusion = []
+        for j, bits in enumerate(sbox_bits):
+            table = []
+            for b in range(1 << n):
+                state = 0
+                for k, bit in enumerate(bits):
+                    if (b >> (n - 1 - k)) & 1:
+                        state |= 1 << self.positions[permutation[bit]]
+                table.append(state)
+            self.diffusion.append(table)
+
+        # bounds[r] is the minimal weight of a trail over r rounds
+        self.bounds = [0]
+
+        self.rounds = 0
+        self.estimate = 0
+        self.trail = []
+        self.best_trail = None
+        return
 
-    def procedure_round_1(cipher):
+    def findOptimalTrail(self, rounds, max_weight):
         """
-        description of function 
+        Returns the minimal weight and a trail with this weight over the
+        given number of rounds, or (None, None) if the minimal weight is
+        larger than max_weight. The minimal weights of fewer rounds are
+        computed first and used as bounds.
         """
-        # create a list of all input differences with hammingweight 1
-        allInputDifferences = self.getAllPossibleDifferences(cipher)
-
-        #for each candidate for \delta X1 do the following
-        for X1 in allInputDifferences:
-            #Let p1 = max_\deltaY (\deltaX1, \deltaY)
-            p1 = self.getMaxProbability(cipher, X1)
-            #If [p1, B_n-1] >= B_n_dash 
-            #if p1*
-                #Call procedure_round_2()
-                #self.procedure_round_i(2)
-        return
-
-    def procedure_round_i(i):
+        for r in range(len(self.bounds), rounds):
+            if self.findOptimalTrail(r, max_weight)[0] is None:
+                return None, None
+
+        # Each further round adds at least one active S-box
+        estimate = self.bounds[rounds - 1] + self.min_active_weight
+        while estimate <= max_weight:
+            weight, trail = self.searchTrail(rounds, estimate)
+            if trail is not None:
+                if len(self.bounds) == rounds:
+                    self.bounds.append(weight)
+                return weight, trail
+            estimate += 1
+        return None, None
+
+    def searchTrail(self, rounds, estimate):
         """
-        description of function 
+        Returns the weight of the first trail with weight at most estimate
+        and the trail, or None if there is no such trail.
         """
-        allOutputDifferences = getAllPossibleDifferences(cipher)
-
-        #For each candidate for \deltaYi do the following
-        for Yi in allOutputDifferences:
-            #Calculate \deltaXi according to the diffusion layer
-            Xi = self.calculateNextInputDifference(Yi, cipher)
-            #Calculate the probability pi according to the DDT of the Sbox
-            pi = getProbabilityForDifferential(Xi, Yi)
-            #If [p1, ..., pi, Bn-i] >= Bndash
-                # Call procedure_round_i(i++)
-        return
-
-    def procedure_round_n():
+        self.rounds = rounds
+        self.estimate = estimate
+        self.trail = [None] * rounds
+        self.best_trail = None
+        self.procedureFirstRound(0, 0, 0, 0, 0)
+        return self.estimate, self.best_trail
+
+    def procedureFirstRound(self, position, input_diff, output_diff,
+                            next_diff, weight):
         """
-        description of function 
+        Chooses the output differences of the S-boxes from position on in
+        the first round, together with the best input difference.
         """
-        #Calculate \deltaXi according to the diffusion layer
-        #Calculate the probability pn according to the DDT of the Sbox
-        #If [p1, ..., pi, pn] >= Bndash
-            #Bndash = [p1, ..., pi, pn]
-        return
-
-    def getAllPossibleDifferences(cipher):
+        if output_diff != 0:
+            self.trail[0] = (input_diff, output_diff, weight)
+            if self.rounds == 1:
+                self.recordTrail(weight)
+            else:
+                self.procedureRound(1, next_diff, weight)
+
+        bound = self.estimate - self.bounds[self.rounds - 1]
+        n = self.sbox_size
+        for j in range(position, self.num_sboxes):
+            for b, sbox_weight, a in self.first_round:
+                if weight + sbox_weight > bound:
+                    break
+                self.procedureFirstRound(j + 1, input_diff | (a << (n*j)),
+                                         output_diff | (b << (n*j)),
+                                         next_diff | self.diffusion[j][b],
+                                         weight + sbox_weight)
+                if self.best_trail is not None:
+                    return
+
+    def procedureRound(self, rnd, input_diff, weight):
         """
-        Returns a list of all differences with hammingweight 1
+        Processes round rnd (counted from zero) for the given input
+        difference and the weight of the previous rounds.
         """
-        return [[1 if i==j else 0 for i in range(cipher.blocksize)] for j in range(cipher.blocksize)]
-
-    def getMaxProbability(cipher, diffIn):
+        n = self.sbox_size
+        mask = (1 << n) - 1
+        active = []
+        j = 0
+        diff = input_diff
+        while diff:
+            if diff & mask:
+                active.append((j, diff & mask))
+            diff >>= n
+            j += 1
+
+        if rnd == self.rounds - 1:
+            # Last round, take the best output difference of each S-box
+            output_diff = 0
+            round_weight = 0
+            for j, a in active:
+                b, sbox_weight = self.transitions[a][0]
+                output_diff |= b << (n*j)
+                round_weight += sbox_weight
+            if weight + round_weight <= self.estimate:
+                self.trail[rnd] = (input_diff, output_diff, round_weight)
+                self.recordTrail(weight + round_weight)
+            return
+
+        # Minimal weight of the remaining S-boxes of this round
+        remaining = [0] * (len(active) + 1)
+        for i in range(len(active) - 1, -1, -1):
+            remaining[i] = remaining[i + 1] + self.min_weights[active[i][1]]
+
+        bound = self.estimate - self.bounds[self.rounds - rnd - 1]
+        if weight + remaining[0] > bound:
+            return
+        self.procedureSboxes(rnd, active, remaining, 0, input_diff, 0, 0,
+                             weight, weight, bound)
+
+    def procedureSboxes(self, rnd, active, remaining, index, input_diff,
+                        output_diff, next_diff, weight, round_start, bound):
         """
-        returns the maximum probability according to a certain input difference
+        Chooses the output differences of the active S-boxes from index on
+        in round rnd.
         """
-        return
-
-    def calculateNextInputDifference(Yi, cipher):
+        if index == len(active):
+            self.trail[rnd] = (input_diff, output_diff, weight - round_start)
+            self.procedureRound(rnd + 1, next_diff, weight)
+            return
+
+        j, a = active[index]
+        limit = bound - remaining[index + 1]
+        shift = self.sbox_size * j
+        for b, sbox_weight in self.transitions[a]:
+            if weight + sbox_weight > limit:
+                break
+            self.procedureSboxes(rnd, active, remaining, index + 1, input_diff,
+                                 output_diff | (b << shift),
+                                 next_diff | self.diffusion[j][b],
+                                 weight + sbox_weight, round_start, bound)
+            if self.best_trail is not None:
+                return
+
+    def recordTrail(self, weight):
         """
-        Calculate the next input difference according to the output difference and the diffusion layer
-        of the cipher
+        Stores the current trail. As the weights are integers and no trail
+        with weight below the estimate exists, the trail is optimal and the
+        search stops.
         """
-        return
+        self.best_trail = list(self.trail)
+        self.estimate = weight
 
-    def getProbabilityForDifferential(Xi, Yi):
+    def getCipherState(self, state):
         """
-        Returns the probability of a differential according to a given input/output difference
+        Converts a state in the S-box order to the bit order of the cipher.
         """
-        return self.DDT[Xi][Yi]
-
-        return
-
-    def calculateDifferentialDistributionTable(cipher):
-        self.DDT = [[0]*len(cipher.sbox) for i in range(len(cipher.sbox))]
-
-        for i in range(len(self.DDT)):
-            for j in range(len(self.DDT)):
-                self.DDT[i ^ j][cipher.sbox[i] ^ cipher.sbox[j]] += 1
-
-
-
+        result = 0
+        for bit, position in enumerate(self.positions):
+            if (state >> position) & 1:
+                result |= 1 << bit
+        return result
 
+    def getCharacteristicData(self, trail, names, wordsize):
+        """
+        Returns the trail as dictionary for a DifferentialCharacteristic,
+        where names are the names of the input and output of the S-box layer
+        and of the weight. The weight of each S-box is encoded as ones in the
+        least significant bits as in the SAT model.
+        """
+        n = self.sbox_size
+        mask = (1 << n) - 1
+        value_format = "0x{{:0{}x}}".format(wordsize // 4)
+        data = {}
+        next_diff = 0
+        for rnd, (input_diff, output_diff, _) in enumerate(trail):
+            weight_bits = 0
+            next_diff = 0
+            for j in range(self.num_sboxes):
+                a = (input_diff >> (n*j)) & mask
+                b = (output_diff >> (n*j)) & mask
+                if a != 0:
+                    weight = self.weights[a][b]
+                    weight_bits |= ((1 << weight) - 1) << (n*j)
+                next_diff |= self.diffusion[j][b]
+            data[names[0] + str(rnd)] = value_format.format(
+                self.getCipherState(input_diff))
+            data[names[1] + str(rnd)] = value_format.format(
+                self.getCipherState(output_diff))
+            data[names[2] + str(rnd)] = value_format.format(
+                self.getCipherState(weight_bits))
+        data[names[0] + str(len(trail))] = value_format.format(
+            self.getCipherState(next_diff))
+        return data
@@ -0,0 +1,178 @@
+'''
+Created on Oct 18, 2026
+
+Computes the DDT, LAT and BCT of S-boxes and data derived from them. Tables
+are computed once per S-box and shared between the CNF encoding of S-boxes
+and the search algorithms. NumPy is used if it is available.
+@author: stefan
+'''
+
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Tables for each (table name, S-box) computed in this process
+_tables = {}
+
+
+def getSboxSize(sbox):
+    """
+    Returns the number of input bits n of the S-box.
+    """
+    n = len(sbox).bit_length() - 1
+    assert(len(sbox) == 1 << n)
+    assert(3 <= n <= 8)
+    return n
+
+
+def cachedTable(function):
+    """
+    Decorator which computes a table only once for each S-box and options.
+    """
+    def getTable(sbox, **options):
+        key = (function.__name__, tuple(sbox), tuple(sorted(options.items())))
+        if key not in _tables:
+            _tables[key] = function(sbox, **options)
+        return _tables[key]
+    getTable.__name__ = function.__name__
+    getTable.__doc__ = function.__doc__
+    return getTable
+
+
+@cachedTable
+def getDDT(sbox):
+    """
+    Returns the difference distribution table of the S-box, where
+    DDT[a][b] = #{x | S(x) ^ S(x ^ a) = b}.
+    """
+    size = 1 << getSboxSize(sbox)
+
+    if numpy is not None:
+        s = numpy.array(sbox, dtype=numpy.int64)
+        x = numpy.arange(size)
+        # Row a contains S(x) ^ S(x ^ a) for all x
+        output_diffs = s[x[:, None] ^ x[None, :]] ^ s[None, :]
+        indices = (x[:, None] * size + output_diffs).ravel()
+        ddt = numpy.bincount(indices, minlength=size * size)
+        return ddt.reshape(size, size).tolist()
+
+    ddt = [[0]*size for i in range(size)]
+    for a in range(size):
+        for b in range(size):
+            ddt[a ^ b][sbox[a] ^ sbox[b]] += 1
+    return ddt
+
+
+@cachedTable
+def getLAT(sbox):
+    """
+    Returns the linear approximation table of the S-box, where
+    LAT[a][b] = #{x | a.x = b.S(x)} - 2^(n-1).
+    """
+    size = 1 << getSboxSize(sbox)
+
+    if numpy is not None:
+        x = numpy.arange(size)
+        parity = numpy.zeros((size, size), dtype=numpy.int64)
+        masked = x[:, None] & x[None, :]
+        while masked.any():
+            parity ^= masked & 1
+            masked >>= 1
+        # (-1)^{a.x} and (-1)^{b.S(x)}
+        signs_in = 1 - 2 * parity
+        signs_out = signs_in[:, numpy.array(sbox, dtype=numpy.int64)]
+        return (signs_in.dot(signs_out.T) // 2).tolist()
+
+    lat = [[-(size // 2)]*size for i in range(size)]
+    for a in range(size):
+        for b in range(size):
+            for x in range(size):
+                if bin((a & x) ^ (b & sbox[x])).count("1") % 2 == 0:
+                    lat[a][b] += 1
+    return lat
+
+
+@cachedTable
+def getBCT(sbox):
+    """
+    Returns the boomerang connectivity table of the S-box, where
+    BCT[a][b] = #{x | S^-1(S(x) ^ b) ^ S^-1(S(x ^ a) ^ b) = a}.
+    Only defined for permutations.
+    """
+    size = 1 << getSboxSize(sbox)
+    assert(sorted(sbox) == list(range(size)))
+
+    inverse = [0] * size
+    for x in range(size):
+        inverse[sbox[x]] = x
+
+    if numpy is not None:
+        s = numpy.array(sbox, dtype=numpy.int64)
+        s_inv = numpy.array(inverse, dtype=numpy.int64)
+        x = numpy.arange(size)
+        bct = numpy.zeros((size, size), dtype=numpy.int64)
+        for a in range(size):
+            # Rows are the output differences b, columns are x
+            left = s_inv[s[None, :] ^ x[:, None]]
+            right = s_inv[s[None, x ^ a] ^ x[:, None]]
+            bct[a] = ((left ^ right) == a).sum(axis=1)
+        return bct.tolist()
+
+    bct = [[0]*size for i in range(size)]
+    for a in range(size):
+        for b in range(size):
+            for x in range(size):
+                if inverse[sbox[x] ^ b] ^ inverse[sbox[x ^ a] ^ b] == a:
+                    bct[a][b] += 1
+    return bct
+
+
+@cachedTable
+def getDifferentialWeights(sbox, rounding="none"):
+    """
+    Returns the weights -log2(DDT[a][b] / 2^n) of all entries of the DDT.
+    Impossible transitions have the weight None. The weights of entries
+    which are not a power of two are
+
+    none    ... kept exactly
+    down    ... rounded down to integers
+    exclude ... None, i.e. these transitions are impossible
+    """
+    n = getSboxSize(sbox)
+    if rounding == "down":
+        return [[n - (entry - 1).bit_length() if entry != 0 else None
+                 for entry in row] for row in getDDT(sbox)]
+    if rounding == "exclude":
+        return [[n - entry.bit_length() + 1
+                 if entry != 0 and entry & (entry - 1) == 0 else None
+                 for entry in row] for row in getDDT(sbox)]
+    return [[n - math.log2(entry) if entry != 0 else None for entry in row]
+            for row in getDDT(sbox)]
+
+
+@cachedTable
+def getMaxProbabilities(sbox):
+    """
+    Returns for each input difference a the maximum probability
+    max_b DDT[a][b] / 2^n.
+    """
+    size = 1 << getSboxSize(sbox)
+    return [max(row) / size for row in getDDT(sbox)]
+
+
+@cachedTable
+def getSortedTransitions(sbox, rounding="none"):
+    """
+    Returns for each input difference a the list of all possible
+    transitions (b, weight), sorted by decreasing probability. The weights
+    are rounded as in getDifferentialWeights.
+    """
+    transitions = []
+    for row in getDifferentialWeights(sbox, rounding=rounding):
+        valid = [(output_diff, weight) for output_diff, weight
+                 in enumerate(row) if weight is not None]
+        transitions.append(sorted(valid, key=lambda entry: entry[1]))
+    return transitions
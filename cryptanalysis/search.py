@@ -4,33 +4,77 @@ Created on Apr 3, 2014
 @author: stefan
 '''
 
-from parser import parsesolveroutput
-from config import (PATH_STP, PATH_BOOLECTOR, PATH_CRYPTOMINISAT, MAX_WEIGHT,
-                    MAX_CHARACTERISTICS)
-from cryptanalysis import matsui
+from parser import (parsesolveroutput, stpcommands, stpparser, stptocnf,
+                    stptosmt)
+from config import (PATH_STP, PATH_BOOLECTOR, PATH_CRYPTOMINISAT, PATH_IPASIR,
+                    PATH_APPROXMC, PATH_CONSTANTS_CACHE, PATH_PORTFOLIO_CACHE,
+                    PATH_RESULT_CACHE, MAX_WEIGHT,
+                    MAX_CHARACTERISTICS, PORTFOLIO_MIN_WINS,
+                    RESULT_CACHE_SIZE)
+from cryptanalysis import diffchars, matsui, ipasir
 
 import subprocess
+import functools
+import hashlib
+import io
+import multiprocessing
+import multiprocessing.connection
+import queue
 import random
 import math
 import os
+import signal
+import threading
 import time
 import sys
+import zlib
 
-from fractions import gcd
+from math import gcd
+
+# Parts of the last generated model, see getModel
+_model_cache = {"key" : None, "parts" : None}
+
+# Best weight found by the processes searching for rotation constants
+_best_weight = None
+
+# Identity of each solver binary for the keys of the result cache
+_solver_identities = {}
+# Size of the result cache as seen by this process, None until it is
+# scanned, see storeCachedResult
+_result_cache_size = None
+
+# Time at which running solvers are killed, None if there is no time limit
+_deadline = None
+# Set if a solver was killed, see reportTimeout
+_timed_out = False
+
+# Prefix of the weights of constants which are only bounds
+BOUND_MARKS = {"exact" : "", "lower" : ">=", "upper" : "<="}
+
+# Size of the chunks in which the output of the SAT solver is read
+READ_SIZE = 2**20
+# Line printed by CryptoMiniSat for each solution
+SOLUTION_LINE = b"s SATISFIABLE"
 
 
 def computeProbabilityOfDifferentials(cipher, parameters):
     """
     Computes the probability of the differential by iteratively
     summing up all characteristics of a specific weight using
-    a SAT solver.
+    a SAT solver. If parameters["counter"] is "approxmc" the number of
+    characteristics is only estimated.
     """
+    if parameters["parallel"] > 1:
+        return computeProbabilityOfDifferentialsParallel(cipher, parameters)
+
     rnd_string_tmp = '%030x' % random.randrange(16**30)
     diff_prob = 0
     characteristics_found = 0
+    counted_weights = 0
     sat_logfile = "tmp/satlog{}.tmp".format(rnd_string_tmp)
 
     start_time = time.time()
+    setDeadline(start_time, parameters["timelimit"])
 
     while not reachedTimelimit(start_time, parameters["timelimit"]) and \
         parameters["sweight"] < MAX_WEIGHT:
@@ -38,44 +82,53 @@ def computeProbabilityOfDifferentials(cipher, parameters):
         if os.path.isfile(sat_logfile):
             os.remove(sat_logfile)
 
-        stp_file = "tmp/{}{}.stp".format(cipher.name, rnd_string_tmp)
-        cipher.createSTP(stp_file, parameters)
-
-        # Start solver
-        sat_process = startSATsolver(stp_file)
-        log_file = open(sat_logfile, "w")
-
-        # Find the number of solutions with the SAT solver
-        print("Finding all trails of weight {}".format(parameters["sweight"]))
-        sys.stdout.flush()
-
-        # Watch the process and count solutions
-        solutions = 0
-        while sat_process.poll() is None:
-            line = sat_process.stdout.readline().decode("utf-8")
-            log_file.write(line)
-            if "s SATISFIABLE" in line:
-                solutions += 1
-            if solutions % 100 == 0:
-                print("\tSolutions: {}\r".format(solutions // 2), end="")
-                sys.stdout.flush()
-
-        log_file.close()
-        print("\tSolutions: {}".format(solutions // 2))
-        sys.stdout.flush()
+        model = getModel(cipher, parameters)
 
-        assert solutions == countSolutionsLogfile(sat_logfile)
+        if parameters["counter"] == "approxmc":
+            print("Estimating the number of trails of weight {}".format(
+                parameters["sweight"]))
+            sys.stdout.flush()
+            try:
+                solutions = countSolutionsApproxMC(model, parameters)
+            except subprocess.TimeoutExpired:
+                reportTimeout(parameters["sweight"])
+                break
+            print("\tSolutions: ~{}".format(solutions))
+            sys.stdout.flush()
+        else:
+            # Start solver
+            sat_process = startSATsolver(model)
+            log_file = None
+            if parameters["satlog"]:
+                log_file = open(sat_logfile, "wb")
+
+            # Find the number of solutions with the SAT solver
+            print("Finding all trails of weight {}".format(
+                parameters["sweight"]))
+            sys.stdout.flush()
 
-        # The encoded CNF contains every solution twice
-        solutions //= 2
+            try:
+                solutions = countSolutionsSATsolver(
+                    sat_process, log_file, True, getSolverTimeout(parameters))
+            except subprocess.TimeoutExpired:
+                reportTimeout(parameters["sweight"])
+                break
+            finally:
+                if log_file is not None:
+                    log_file.close()
+            print("\tSolutions: {}".format(solutions))
+            sys.stdout.flush()
 
         # Print result
         diff_prob += math.pow(2, -parameters["sweight"]) * solutions
         characteristics_found += solutions
+        counted_weights += 1
         if diff_prob > 0.0:
             #print("\tSolutions: {}".format(solutions))
             print("\tTrails found: {}".format(characteristics_found))
             print("\tCurrent Probability: " + str(math.log(diff_prob, 2)))
+            if parameters["counter"] == "approxmc":
+                printProbabilityBounds(diff_prob, counted_weights, parameters)
             print("\tTime: {}s".format(round(time.time() - start_time, 2)))
             sys.stdout.flush()
         parameters["sweight"] += 1
@@ -83,19 +136,138 @@ def computeProbabilityOfDifferentials(cipher, parameters):
     return diff_prob
 
 
+def computeProbabilityOfDifferentialsParallel(cipher, parameters):
+    """
+    Computes the probability of the differential like
+    computeProbabilityOfDifferentials, but counts the characteristics for the
+    next parameters["parallel"] weights concurrently. The results are
+    summed up in the order of the weights.
+    """
+    diff_prob = 0
+    characteristics_found = 0
+    counted_weights = 0
+    start_time = time.time()
+    setDeadline(start_time, parameters["timelimit"])
+
+    # Generate the model once for all jobs
+    loadModel(cipher, parameters)
+
+    running = {}
+    counted = {}
+    next_weight = parameters["sweight"]
+
+    try:
+        while not reachedTimelimit(start_time, parameters["timelimit"]):
+            # Start jobs for the next weights
+            while len(running) < parameters["parallel"] and \
+                  next_weight < MAX_WEIGHT:
+                print("Finding all trails of weight {}".format(next_weight))
+                sys.stdout.flush()
+                running[next_weight] = startJob(countWeight, cipher,
+                                                parameters, next_weight)
+                next_weight += 1
+
+            if not running:
+                break
+
+            finished = receiveResult(running, timeout=1)
+            if finished is None:
+                continue
+            weight, solutions = finished
+            if solutions is None:
+                reportTimeout(weight)
+                break
+            counted[weight] = solutions
+
+            # Add the results which are complete up to this weight
+            while parameters["sweight"] in counted:
+                solutions = counted.pop(parameters["sweight"])
+                diff_prob += math.pow(2, -parameters["sweight"]) * solutions
+                characteristics_found += solutions
+                counted_weights += 1
+                print("Weight: {}".format(parameters["sweight"]))
+                print("\tSolutions: {}".format(solutions))
+                if diff_prob > 0.0:
+                    print("\tTrails found: {}".format(characteristics_found))
+                    print("\tCurrent Probability: " +
+                          str(math.log(diff_prob, 2)))
+                    if parameters["counter"] == "approxmc":
+                        printProbabilityBounds(diff_prob, counted_weights,
+                                               parameters)
+                    print("\tTime: {}s".format(round(time.time() - start_time,
+                                                     2)))
+                sys.stdout.flush()
+                parameters["sweight"] += 1
+    finally:
+        # Also reached if the search is interrupted
+        for weight in list(running):
+            cancelJob(*running.pop(weight))
+
+    return diff_prob
+
+
+def printProbabilityBounds(diff_prob, counted_weights, parameters):
+    """
+    Prints the bounds on the probability of the differential for estimated
+    numbers of characteristics. ApproxMC guarantees for each weight that the
+    estimate is within a factor of 1 + epsilon with probability 1 - delta.
+    """
+    factor = 1 + parameters["epsilon"]
+    confidence = max(0.0, 1 - counted_weights * parameters["delta"])
+    print("\tBounds: [{}, {}] with probability >= {:.2f}".format(
+        math.log(diff_prob / factor, 2), math.log(diff_prob * factor, 2),
+        confidence))
+    return
+
+
 def findBestConstants(cipher, parameters):
     """
     Search for the optimal differential or linear characteristics.
     Works only for SIMON!
+
+    The pairs (alpha, beta) are searched by parameters["parallel"]
+    processes. Constants which are equivalent under multiplication with a
+    unit modulo the wordsize are only searched once. The best constants
+    have the highest minimal weight, the search for a pair is cut off as
+    soon as it has a characteristic below the highest weight found. The
+    results are cached in PATH_CONSTANTS_CACHE.
     """
-    weight = parameters["sweight"]
     wordsize = parameters["wordsize"]
 
-    constantMinWeights = []
+    # Each class of equivalent constants is searched once
     gamma = parameters["sweight"]
+    classes = set()
+    for beta in range(0, wordsize):
+        for alpha in range(beta + 1, wordsize):
+            if gcd(alpha - beta, wordsize) == 1:
+                classes.add(getCanonicalConstants(cipher, parameters,
+                                                  (alpha, beta, gamma)))
+
+    # Start with the highest exact weight of an interrupted run
+    cached_weights = [loadConstantsWeight(cipher, parameters, constants,
+                                          parameters["rounds"])
+                      for constants in classes]
+    results = {}
+    setDeadline(time.time(), parameters["timelimit"])
+    best_weight = multiprocessing.Value("i", max(
+        [cached[0] for cached in cached_weights
+         if cached is not None and cached[1] == "exact"], default=0))
+    with multiprocessing.Pool(parameters["parallel"],
+                              initializer=initConstantsSearch,
+                              initargs=(best_weight,)) as pool:
+        search_class = functools.partial(findMinWeightConstants, cipher,
+                                         parameters)
+        for constants, weight, kind in pool.imap_unordered(search_class,
+                                                           sorted(classes)):
+            print("Alpha: {} Beta: {} Gamma: {} Weight: {}{}".format(
+                constants[0], constants[1], constants[2],
+                BOUND_MARKS[kind], weight))
+            sys.stdout.flush()
+            results[constants] = (weight, kind)
+
+    constantMinWeights = []
     for beta in range(0, wordsize):
         for alpha in range(0, wordsize):
-            weight = 0
             #Filter cases where alpha = beta
             if alpha == beta:
                 constantMinWeights.append(0)
@@ -109,44 +281,224 @@ def findBestConstants(cipher, parameters):
             if gcd(alpha - beta, wordsize) != 1:
                 constantMinWeights.append(1)
                 continue
+            constantMinWeights.append(results[getCanonicalConstants(
+                cipher, parameters, (alpha, beta, gamma))][0])
+    print(constantMinWeights)
 
-            while weight < MAX_WEIGHT:
-                parameters["rotationconstants"] = [alpha, beta, gamma]
+    # Weights in the matrix which are only bounds
+    for constants, (weight, kind) in sorted(results.items()):
+        if kind != "exact":
+            print("Alpha: {} Beta: {} Weight: {}{} ({} bound)".format(
+                constants[0], constants[1], BOUND_MARKS[kind], weight, kind))
+    sys.stdout.flush()
+    return constantMinWeights
 
-                # Construct problem instance for given parameters
-                stp_file = "tmp/{}_{}const.stp".format(cipher.name, gamma)
-                cipher.createSTP(stp_file, parameters)
 
-                result = ""
-                if parameters["boolector"]:
-                    result = solveBoolector(stp_file)
-                else:
-                    result = solveSTP(stp_file)
-
-                # Check if a characteristic was found
-                if foundSolution(result):
-                    print("Alpha: {} Beta: {} Gamma: {} Weight: {}".format(
-                        alpha, beta, gamma, weight))
-                    break
-                weight += 1
-            constantMinWeights.append(weight)
-    print(constantMinWeights)
-    return constantMinWeights
+def getCanonicalConstants(cipher, parameters, constants):
+    """
+    Returns the representative of the class of rotation constants which
+    give an equivalent cipher. Multiplying all constants with a unit k
+    modulo the wordsize corresponds to the bit permutation i -> k * i, and
+    alpha and beta can be swapped. Fixed variables are not invariant under
+    the permutation, in this case only alpha and beta are ordered.
+    """
+    wordsize = parameters["wordsize"]
+    units = [1]
+    if not parameters["fixedVariables"]:
+        units = [k for k in range(1, wordsize) if gcd(k, wordsize) == 1]
+
+    candidates = []
+    for k in units:
+        alpha, beta, gamma = [(k * c) % wordsize for c in constants]
+        candidates.append((max(alpha, beta), min(alpha, beta), gamma))
+    return min(candidates)
+
+
+def initConstantsSearch(best_weight):
+    """
+    Shares the best weight found between the processes of
+    findBestConstants and findBestConstantsChaskey.
+    """
+    global _best_weight
+    _best_weight = best_weight
+    return
+
+
+def findMinWeightConstants(cipher, parameters, constants):
+    """
+    Returns the constants, the minimal weight of a characteristic for them
+    and whether it is "exact", a "lower" or an "upper" bound. If there is a
+    characteristic below the highest weight found for any constants, the
+    constants can not be the best ones and only this upper bound is
+    returned. If the solver timed out or the deadline of the search has
+    passed, the weight is a lower bound.
+
+    Used by findBestConstants and findBestConstantsChaskey, the constants
+    are passed to the cipher as parameters["rotationconstants"].
+    """
+    cached = loadConstantsWeight(cipher, parameters, constants,
+                                 parameters["rounds"])
+    if cached is not None and cached[1] == "exact":
+        return constants, cached[0], "exact"
+
+    best_weight = _best_weight.value
+    if cached is not None and cached[1] == "upper" and \
+       cached[0] < best_weight:
+        return constants, cached[0], "upper"
+
+    constant_parameters = dict(parameters)
+    constant_parameters["rotationconstants"] = list(constants)
+    weight = getConstantsLowerBound(cipher, parameters, constants)
+    if reachedDeadline():
+        # Every solver would be killed at once, do not build the model
+        return constants, weight, "lower"
+    if weight < best_weight:
+        try:
+            below_best = hasCharacteristicBelow(cipher, constant_parameters,
+                                                best_weight)
+        except subprocess.TimeoutExpired:
+            return constants, weight, "lower"
+        if below_best:
+            storeConstantsWeight(cipher, parameters, constants,
+                                 best_weight - 1, "upper")
+            return constants, best_weight - 1, "upper"
+        weight = best_weight
+
+    while weight < MAX_WEIGHT:
+        if reachedDeadline():
+            storeConstantsWeight(cipher, parameters, constants, weight,
+                                 "lower")
+            return constants, weight, "lower"
+
+        # Construct problem instance for given parameters
+        constant_parameters["sweight"] = weight
+        model = getModel(cipher, constant_parameters)
+
+        try:
+            result = solveModel(model, constant_parameters)
+        except subprocess.TimeoutExpired:
+            # The weights below are impossible, the weight is a lower bound
+            storeConstantsWeight(cipher, parameters, constants, weight,
+                                 "lower")
+            return constants, weight, "lower"
+
+        # Check if a characteristic was found
+        if foundSolution(result):
+            break
+        weight += 1
+
+    with _best_weight.get_lock():
+        _best_weight.value = max(_best_weight.value, weight)
+
+    storeConstantsWeight(cipher, parameters, constants, weight, "exact")
+    return constants, weight, "exact"
+
+
+def hasCharacteristicBelow(cipher, constant_parameters, weight):
+    """
+    Decides with a single query whether the constants have a characteristic
+    with a weight below the given one.
+    """
+    stpcommands.setExactWeight(False)
+    constant_parameters["sweight"] = weight - 1
+    try:
+        model = getModel(cipher, constant_parameters)
+        result = solveModel(model, constant_parameters)
+    finally:
+        stpcommands.setExactWeight(True)
+    return foundSolution(result)
+
+
+def getConstantsLowerBound(cipher, parameters, constants):
+    """
+    Returns a lower bound on the minimal weight for the constants from the
+    cache. Without fixed variables and iterative characteristics, the
+    weights for fewer rounds are lower bounds as well.
+    """
+    rounds = parameters["rounds"]
+    cached = loadConstantsWeight(cipher, parameters, constants, rounds)
+    if cached is not None and cached[1] != "upper":
+        return cached[0]
+
+    if not parameters["fixedVariables"] and not parameters["iterative"]:
+        for fewer_rounds in range(rounds - 1, 0, -1):
+            cached = loadConstantsWeight(cipher, parameters, constants,
+                                         fewer_rounds)
+            if cached is not None and cached[1] != "upper":
+                return cached[0]
+    return 0
+
+
+def getConstantsCacheKey(cipher, parameters, constants, rounds):
+    """
+    Returns the key and the cache file of the minimal weight for the
+    constants.
+    """
+    key = "{};{};{};{};{};{}".format(
+        cipher.name, parameters["wordsize"], rounds,
+        ",".join(map(str, constants)), parameters["iterative"],
+        sorted(parameters["fixedVariables"].items()))
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return key, os.path.join(PATH_CONSTANTS_CACHE, "{}.txt".format(digest))
+
+
+def loadConstantsWeight(cipher, parameters, constants, rounds):
+    """
+    Returns the cached weight for the constants and whether it is "exact",
+    a "lower" or an "upper" bound, or None if it is not available on disk.
+    """
+    key, filename = getConstantsCacheKey(cipher, parameters, constants,
+                                         rounds)
+    if not os.path.isfile(filename):
+        return None
+
+    with open(filename, "r") as cache_file:
+        # First line contains the key to detect collisions
+        if cache_file.readline().strip() != key:
+            return None
+        weight, kind = cache_file.readline().split()
+        return int(weight), kind
+
+
+def storeConstantsWeight(cipher, parameters, constants, weight, kind):
+    """
+    Writes the weight for the constants and whether it is "exact", a
+    "lower" or an "upper" bound to the disk cache. The file is replaced
+    atomically so that concurrent runs never see a partial file.
+    """
+    key, filename = getConstantsCacheKey(cipher, parameters, constants,
+                                         parameters["rounds"])
+    tmp_filename = "{}.{}.tmp".format(filename, os.getpid())
+    try:
+        os.makedirs(PATH_CONSTANTS_CACHE, exist_ok=True)
+        with open(tmp_filename, "w") as cache_file:
+            cache_file.write(key + "\n")
+            cache_file.write("{} {}\n".format(weight, kind))
+        os.replace(tmp_filename, filename)
+    except OSError:
+        # The cache is optional, the weight is searched again next time
+        pass
+    return
 
 def findBestConstantsChaskey(cipher, parameters):
     """
     find the best constants for chaskey (works for various word sizes)
+
+    The constants are searched by parameters["parallel"] processes and the
+    minimal weights are stored in PATH_CONSTANTS_CACHE, such that an
+    interrupted search continues with the remaining constants. Constants
+    with a characteristic below the best weight found are skipped, this
+    upper bound is cached as well.
     """
-    weight = parameters["sweight"]
     wordsize = parameters["wordsize"]
     rounds = parameters["rounds"]
-    bestConstants = []
 
+    results = {}
+    upper_bounds = {}
+    remaining = []
     for rotv0up in range(0, wordsize):
         for rotv1up in range(0, wordsize):
             for rotv3up in range(0, wordsize):
-                weight = 0
-
                 #filter cases where all constants are the same
                 if rotv0up == rotv1up and rotv1up == rotv3up:
                     continue
@@ -154,35 +506,86 @@ def findBestConstantsChaskey(cipher, parameters):
                 rotv0down = rotv0up
                 rotv1down = rotv1up
                 rotv3down = rotv3up
+                constants = (rotv0up, rotv0down, rotv1up, rotv1down,
+                             rotv3up, rotv3down)
+
+                cached = loadConstantsWeight(cipher, parameters, constants,
+                                             rounds)
+                if cached is not None and cached[1] == "exact":
+                    results[constants] = cached[0]
+                elif cached is not None and cached[1] == "upper":
+                    upper_bounds[constants] = cached[0]
+                else:
+                    remaining.append(constants)
+
+    # Constants below the best weight of an interrupted run are skipped
+    best = max(results.values(), default=0)
+    skipped = 0
+    for constants, weight in upper_bounds.items():
+        if weight < best:
+            skipped += 1
+        else:
+            remaining.append(constants)
 
-                #for a given number of rounds - search the best weight
-                parameters["rotationconstants"] = [rotv0up, rotv0down, rotv1up, rotv1down, rotv3up, rotv3down]
+    total = len(results) + skipped + len(remaining)
+    print("Found {} of {} constants in {}".format(len(results) + skipped,
+                                                  total, PATH_CONSTANTS_CACHE))
+    sys.stdout.flush()
 
-                #disable printing
-                sys.stdout = open(os.devnull, "w")
-                weight = findMinWeightCharacteristic(cipher, parameters)
-                sys.stdout = sys.__stdout__
+    timed_out = 0
+    setDeadline(time.time(), parameters["timelimit"])
+    best_weight = multiprocessing.Value("i", best)
+    with multiprocessing.Pool(parameters["parallel"],
+                              initializer=initConstantsSearch,
+                              initargs=(best_weight,)) as pool:
+        search_constants = functools.partial(findMinWeightConstants,
+                                             cipher, parameters)
+        for constants, weight, kind in pool.imap_unordered(search_constants,
+                                                           remaining):
+            if kind == "lower":
+                timed_out += 1
+                print("[{}/{}] Constants: {} Timed out at weight {}".format(
+                    len(results) + skipped + timed_out, total,
+                    list(constants), weight))
+            else:
+                if kind == "exact":
+                    results[constants] = weight
+                else:
+                    skipped += 1
+                print("[{}/{}] Constants: {} Weight: {}{}".format(
+                    len(results) + skipped + timed_out, total,
+                    list(constants), BOUND_MARKS[kind], weight))
+            sys.stdout.flush()
 
-                added = 0
-                for subset in bestConstants:
-                    if subset[0] == weight:
-                        subset.append([rotv0up, rotv0down, rotv1up, rotv1down, rotv3up, rotv3down])
-                        added = 1
-                        break
-                if added == 0:  # weight doesnt exist yet, create new entry
-                    bestConstants.append([weight, [rotv0up, rotv0down, rotv1up, rotv1down, rotv3up, rotv3down]])
+            if reachedDeadline():
+                # Leaving the pool terminates the workers, the remaining
+                # constants are searched when the run is resumed
+                print("Reached the time limit of {} seconds".format(
+                    parameters["timelimit"]))
+                break
+
+    bestConstants = {}
+    for constants, weight in results.items():
+        bestConstants.setdefault(weight, []).append(list(constants))
 
     #print best constants
     print("Best Constants for {}\n".format(cipher.name))
     sys.stdout.flush()
-    for subset in bestConstants:
-        print("Weight: {}".format(subset[0]))
+    for weight in sorted(bestConstants, reverse=True):
+        print("Weight: {}".format(weight))
         sys.stdout.flush()
-        for parameters in subset[1:]:
-            print(parameters)
+        for constants in sorted(bestConstants[weight]):
+            print(constants)
             sys.stdout.flush()
         print("\n")
         sys.stdout.flush()
+    print("Skipped {} constants with a lower weight".format(skipped))
+    if timed_out:
+        print("Timed out for {} constants".format(timed_out))
+    searched = len(results) + skipped + timed_out
+    if searched < total:
+        print("Did not search {} constants".format(total - searched))
+    sys.stdout.flush()
 
     return
 
@@ -192,6 +595,12 @@ def findMinWeightCharacteristic(cipher, parameters):
     Find a characteristic of minimal weight for the cipher
     parameters = [rounds, wordsize, sweight, isIterative, fixedVariables]
     """
+    if parameters["incremental"]:
+        return findMinWeightCharacteristicIncremental(cipher, parameters)
+    if parameters["parallel"] > 1:
+        return findMinWeightCharacteristicParallel(cipher, parameters)
+    if parameters["strategy"] != "linear":
+        return findMinWeightCharacteristicBound(cipher, parameters)
 
     print(("Starting search for characteristic with minimal weight\n"
            "{} - Rounds: {} Wordsize: {}".format(cipher.name,
@@ -201,6 +610,7 @@ def findMinWeightCharacteristic(cipher, parameters):
     sys.stdout.flush()
 
     start_time = time.time()
+    setDeadline(start_time, parameters["timelimit"])
 
     while not reachedTimelimit(start_time, parameters["timelimit"]) and \
         parameters["sweight"] < MAX_WEIGHT:
@@ -210,27 +620,16 @@ def findMinWeightCharacteristic(cipher, parameters):
         sys.stdout.flush()
 
         # Construct problem instance for given parameters
-        stp_file = "tmp/{}{}.stp".format(cipher.name,
-                                         parameters["wordsize"])
-        cipher.createSTP(stp_file, parameters)
+        model = getModel(cipher, parameters)
 
-        result = ""
-        if parameters["boolector"]:
-            result = solveBoolector(stp_file)
-        else:
-            result = solveSTP(stp_file)
+        try:
+            result = solveModel(model, parameters)
+        except subprocess.TimeoutExpired:
+            reportTimeout(parameters["sweight"])
+            break
 
         # Check if a characteristic was found
         if foundSolution(result):
-            current_time = round(time.time() - start_time, 2)
-            print("---")
-            print(("Characteristic for {} - Rounds {} - Wordsize {} - "
-                   "Weight {} - Time {}s".format(cipher.name,
-                                                 parameters["rounds"],
-                                                 parameters["wordsize"],
-                                                 parameters["sweight"],
-                                                 current_time)))
-            sys.stdout.flush()
             characteristic = ""
             if parameters["boolector"]:
                 characteristic = parsesolveroutput.getCharBoolectorOutput(
@@ -239,78 +638,526 @@ def findMinWeightCharacteristic(cipher, parameters):
                 characteristic = parsesolveroutput.getCharSTPOutput(
                     result, cipher, parameters["rounds"])
 
-            characteristic.printText()
-            sys.stdout.flush()
+            printCharacteristic(cipher, parameters, characteristic,
+                                start_time)
+            break
+        parameters["sweight"] += 1
+    return parameters["sweight"]
 
-            if parameters["dot"]:
-                with open(parameters["dot"], "w") as dot_file:
-                    dot_file.write("digraph graphname {")
-                    dot_file.write(characteristic.getDOTString())
-                    dot_file.write("}")
-                print("Wrote .dot to {}".format(parameters["dot"]))
-                sys.stdout.flush()
-                
-            if parameters["latex"]:
-                with open(parameters["latex"], "w") as tex_file:
-                    tex_file.write(characteristic.getTexString())
-                print("Wrote .tex to {}".format(parameters["latex"])) 
-                sys.stdout.flush()               
+
+def findMinWeightCharacteristicIncremental(cipher, parameters):
+    """
+    Find a characteristic of minimal weight for the cipher. The model is
+    only constructed once and the weight is passed as assumption to an
+    incremental SAT solver, which keeps the learned clauses between the
+    weights.
+    """
+    if stpcommands.weight_encoding == "counter":
+        print("ERROR: The counter weight encoding asserts the weight and "
+              "can not be used for the incremental search.")
+        exit(1)
+
+    print(("Starting incremental search for characteristic with minimal "
+           "weight\n{} - Rounds: {} Wordsize: {}".format(cipher.name,
+                                                         parameters["rounds"],
+                                                         parameters["wordsize"])))
+    print("---")
+    sys.stdout.flush()
+
+    start_time = time.time()
+    setDeadline(start_time, parameters["timelimit"])
+
+    # Construct the model once, the asserted weight is replaced by assumptions
+    model = stptocnf.CNFModel(["weight"])
+    model.parseString(generateModel(cipher, parameters))
+    if "weight" not in model.assumed_values:
+        print("ERROR: The model of {} does not assert the weight.".format(
+            cipher.name))
+        exit(1)
+
+    solver = ipasir.IpasirSolver(PATH_IPASIR)
+    for clause in model.getDIMACSClauses():
+        solver.addClause(clause)
+
+    while not reachedTimelimit(start_time, parameters["timelimit"]) and \
+        parameters["sweight"] < MAX_WEIGHT:
+
+        print("Weight: {} Time: {}s".format(parameters["sweight"],
+                                            round(time.time() - start_time, 2)))
+        sys.stdout.flush()
+
+        assumptions = model.getAssumptions("weight", parameters["sweight"])
+        result = False
+        if assumptions is not None:
+            solver.setTimeout(getSolverTimeout(parameters))
+            result = solver.solve(assumptions)
+        if result is None:
+            reportTimeout(parameters["sweight"])
+            break
+        if result:
+            assignment = solver.getAssignment(model.getNumDIMACSVars())
+            characteristic = parsesolveroutput.getCharSTPOutput(
+                model.getSTPOutput(assignment), cipher, parameters["rounds"])
+            printCharacteristic(cipher, parameters, characteristic,
+                                start_time)
             break
         parameters["sweight"] += 1
+
+    solver.release()
     return parameters["sweight"]
 
 
-def findAllCharacteristics(cipher, parameters):
+def findMinWeightCharacteristicBound(cipher, parameters):
     """
-    Outputs all characteristics of a specific weight by excluding
-    solutions iteratively.
+    Find a characteristic of minimal weight for the cipher by bounding the
+    weight from above. Every characteristic found lowers the bound to its
+    weight - 1 until no characteristic is left. Weights below sweight are
+    assumed to be impossible.
+
+    descend ... starts with the bound MAX_WEIGHT - 1
+    gallop  ... raises the bound from sweight in doubling steps until a
+                characteristic is found and continues with a binary search
     """
-    rnd_string_tmp = '%030x' % random.randrange(16**30)
+    print(("Starting search for characteristic with minimal weight\n"
+           "{} - Rounds: {} Wordsize: {} Strategy: {}".format(
+               cipher.name, parameters["rounds"], parameters["wordsize"],
+               parameters["strategy"])))
+    print("---")
+    sys.stdout.flush()
+
     start_time = time.time()
-    total_num_characteristics = 0
+    setDeadline(start_time, parameters["timelimit"])
+    stpcommands.setExactWeight(False)
+
+    lower = parameters["sweight"]
+    upper = MAX_WEIGHT - 1
+    step = 1
+    best_characteristic = None
 
     while not reachedTimelimit(start_time, parameters["timelimit"]) and \
-          parameters["sweight"] != parameters["endweight"]:
-        stp_file = "tmp/{}{}.stp".format(cipher.name, rnd_string_tmp)
+        lower <= upper:
 
-        # Start STP TODO: add boolector support
-        cipher.createSTP(stp_file, parameters)
+        if best_characteristic is None and parameters["strategy"] == "gallop":
+            bound = min(lower + step - 1, upper)
+            step *= 2
+        elif parameters["strategy"] == "gallop":
+            bound = (lower + upper) // 2
+        else:
+            bound = upper
+
+        print("Weight <= {} Time: {}s".format(bound,
+                                             round(time.time() - start_time, 2)))
+        sys.stdout.flush()
+
+        # Construct problem instance for given parameters
+        bound_parameters = dict(parameters)
+        bound_parameters["sweight"] = bound
+        model = getModel(cipher, bound_parameters)
+
+        try:
+            result = solveModel(model, parameters)
+        except subprocess.TimeoutExpired:
+            reportTimeout("<= {}".format(bound))
+            break
+
+        if not foundSolution(result):
+            lower = bound + 1
+            continue
 
-        result = ""
         if parameters["boolector"]:
-            result = solveBoolector(stp_file)
+            characteristic = parsesolveroutput.getCharBoolectorOutput(
+                result, cipher, parameters["rounds"])
         else:
-            result = solveSTP(stp_file)
+            characteristic = parsesolveroutput.getCharSTPOutput(
+                result, cipher, parameters["rounds"])
+
+        weight = int(characteristic.weight, 16)
+        if weight > bound:
+            print("ERROR: The model of {} does not bound the weight.".format(
+                cipher.name))
+            exit(1)
+        print("Found characteristic with weight {}".format(weight))
+        sys.stdout.flush()
+        best_characteristic = characteristic
+        upper = weight - 1
 
-        # Check for solution
-        if foundSolution(result):
-            print(("Characteristic for {} - Rounds {} - Wordsize {}- "
-                   "Weight {}".format(cipher.name,
-                                      parameters["rounds"],
-                                      parameters["wordsize"],
-                                      parameters["sweight"])))
-            sys.stdout.flush()
+    stpcommands.setExactWeight(True)
 
-            characteristic = ""
-            if parameters["boolector"]:
-                characteristic = parsesolveroutput.getCharBoolectorOutput(
-                    result, cipher, parameters["rounds"])
-            else:
-                characteristic = parsesolveroutput.getCharSTPOutput(
-                    result, cipher, parameters["rounds"])
+    if best_characteristic is None:
+        parameters["sweight"] = lower
+        return parameters["sweight"]
 
-            characteristic.printText()
-            sys.stdout.flush()
-            parameters["blockedCharacteristics"].append(characteristic)
-        else:
-            print("Found {} characteristics with weight {}".format(
-                total_num_characteristics, parameters["sweight"]))
-            sys.stdout.flush()
-            parameters["sweight"] += 1
-            total_num_characteristics = 0
+    parameters["sweight"] = int(best_characteristic.weight, 16)
+    if lower <= upper:
+        print("Stopped before the weight {} was proven to be minimal".format(
+            parameters["sweight"]))
+    printCharacteristic(cipher, parameters, best_characteristic, start_time)
+    return parameters["sweight"]
+
+
+def findMinWeightCharacteristicParallel(cipher, parameters):
+    """
+    Find a characteristic of minimal weight for the cipher by testing the
+    next parameters["parallel"] weights concurrently. Jobs for weights above
+    a weight with a solution are cancelled and the minimum is reported once
+    all lower weights are proven to have no solution.
+    """
+    print(("Starting parallel search for characteristic with minimal weight\n"
+           "{} - Rounds: {} Wordsize: {}".format(cipher.name,
+                                                 parameters["rounds"],
+                                                 parameters["wordsize"])))
+    print("---")
+    sys.stdout.flush()
+
+    start_time = time.time()
+    setDeadline(start_time, parameters["timelimit"])
+
+    # Generate the model once for all jobs
+    loadModel(cipher, parameters)
+
+    running = {}
+    next_weight = parameters["sweight"]
+    best_weight = None
+    best_result = None
+    impossible = set()
+
+    try:
+        while not reachedTimelimit(start_time, parameters["timelimit"]):
+            # All weights below the best one have no solution
+            if best_weight is not None and \
+               all(weight in impossible
+                   for weight in range(parameters["sweight"], best_weight)):
+                break
+
+            # Start jobs for the next weights
+            while len(running) < parameters["parallel"] and \
+                  next_weight < MAX_WEIGHT and \
+                  (best_weight is None or next_weight < best_weight):
+                print("Weight: {} Time: {}s".format(
+                    next_weight, round(time.time() - start_time, 2)))
+                sys.stdout.flush()
+                running[next_weight] = startJob(solveWeight, cipher,
+                                                parameters, next_weight)
+                next_weight += 1
+
+            if not running:
+                break
+
+            finished = receiveResult(running, timeout=1)
+            if finished is None:
+                continue
+            weight, result = finished
+
+            if result is None:
+                reportTimeout(weight)
+                break
+
+            if not foundSolution(result):
+                impossible.add(weight)
+                continue
+
+            if best_weight is None or weight < best_weight:
+                best_weight = weight
+                best_result = result
+                # Cancel all jobs for higher weights
+                for higher_weight in [w for w in running if w > weight]:
+                    cancelJob(*running.pop(higher_weight))
+    finally:
+        # Also reached if the search is interrupted
+        for weight in list(running):
+            cancelJob(*running.pop(weight))
+
+    if best_weight is None or \
+       any(weight not in impossible
+           for weight in range(parameters["sweight"], best_weight)):
+        # Stopped before the minimum was proven
+        parameters["sweight"] = min(set(range(parameters["sweight"],
+                                              next_weight)) - impossible,
+                                    default=next_weight)
+        return parameters["sweight"]
+
+    parameters["sweight"] = best_weight
+    if parameters["boolector"]:
+        characteristic = parsesolveroutput.getCharBoolectorOutput(
+            best_result, cipher, parameters["rounds"])
+    else:
+        characteristic = parsesolveroutput.getCharSTPOutput(
+            best_result, cipher, parameters["rounds"])
+    printCharacteristic(cipher, parameters, characteristic, start_time)
+    return parameters["sweight"]
+
+
+def generateModel(cipher, parameters):
+    """
+    Returns the STP model of the cipher for the given parameters, which is
+    constructed in memory.
+    """
+    model_file = io.StringIO()
+    cipher.createSTP(model_file, parameters)
+    return model_file.getvalue()
+
+
+def getModel(cipher, parameters):
+    """
+    Returns the STP model of the cipher for the given parameters. The model
+    is only generated once for all weights and blocked characteristics,
+    later calls only replace the weight assertion and add the blocked
+    characteristics.
+    """
+    parts = loadModel(cipher, parameters)
+    if parts is None:
+        return generateModel(cipher, parameters)
+
+    head, tail, widths = parts
+    with stpcommands.STPWriter() as model_file:
+        model_file.write(head)
+        model_file.write(stpcommands.getWeightAssertion(parameters["sweight"]))
+        model_file.write(tail)
+        for characteristic in parameters["blockedCharacteristics"]:
+            # The words of the characteristic have the width of the state
+            name = next(name for name in characteristic.characteristic_data
+                        if not name.startswith('w'))
+            stpcommands.blockCharacteristic(model_file, characteristic,
+                                            widths[name])
+        stpcommands.setupQuery(model_file)
+        return model_file.getvalue()
+
+
+def loadModel(cipher, parameters):
+    """
+    Returns the model of the cipher split into the part before and after the
+    weight assertion, without blocked characteristics and query, together
+    with the declared widths of the variables. Returns None if the model can
+    not be split.
+    """
+    # The structure of the counter encoding depends on the weight
+    if stpcommands.weight_encoding == "counter":
+        return None
+
+    model_parameters = {key : value for key, value in parameters.items()
+                        if key not in ["sweight", "blockedCharacteristics"]}
+    key = (cipher.name, stpcommands.weight_encoding,
+           stpcommands.exact_weight, repr(stpcommands.round_bounds),
+           repr(sorted(model_parameters.items())))
+    if _model_cache["key"] == key:
+        return _model_cache["parts"]
+
+    model_parameters["sweight"] = parameters["sweight"]
+    model_parameters["blockedCharacteristics"] = []
+    model = generateModel(cipher, model_parameters)
+
+    parts = None
+    weight_assertion = stpcommands.getWeightAssertion(parameters["sweight"])
+    query = "QUERY(FALSE);\nCOUNTEREXAMPLE;\n"
+    if model.count(weight_assertion) == 1 and model.endswith(query):
+        head, tail = model[:-len(query)].split(weight_assertion)
+        parts = (head, tail, getDeclaredWidths(head))
+
+    _model_cache["key"] = key
+    _model_cache["parts"] = parts
+    return parts
+
+
+def getDeclaredWidths(model):
+    """
+    Returns the widths of the variables declared in the STP model.
+    """
+    widths = {}
+    for statement in model.split(";"):
+        if "%" in statement:
+            statement = stpparser.COMMENT_REGEX.sub("", statement)
+        statement = statement.strip()
+        if statement.startswith("ASSERT"):
             continue
+        declaration = stpparser.DECLARATION_REGEX.match(statement)
+        if declaration is not None:
+            for name in declaration.group(1).split(","):
+                widths[name.strip()] = int(declaration.group(2))
+    return widths
 
-        total_num_characteristics += 1
+
+def solveWeight(cipher, parameters, weight, connection):
+    """
+    Solves the model for the given weight and sends the result through the
+    connection, or None if the solver timed out. Runs in its own process
+    group, such that the solver is terminated together with the job.
+    """
+    os.setpgrp()
+    weight_parameters = dict(parameters)
+    weight_parameters["sweight"] = weight
+    model = getModel(cipher, weight_parameters)
+    try:
+        result = solveModel(model, weight_parameters)
+    except subprocess.TimeoutExpired:
+        result = None
+    connection.send(result)
+    connection.close()
+    return
+
+
+def countWeight(cipher, parameters, weight, connection):
+    """
+    Counts the characteristics of the given weight and sends the number
+    through the connection, or None if the solver timed out. Runs in its
+    own process group, such that the solver is terminated together with the
+    job.
+    """
+    os.setpgrp()
+    weight_parameters = dict(parameters)
+    weight_parameters["sweight"] = weight
+    model = getModel(cipher, weight_parameters)
+    try:
+        if parameters["counter"] == "approxmc":
+            solutions = countSolutionsApproxMC(model, parameters)
+        else:
+            sat_process = startSATsolver(model)
+            solutions = countSolutionsSATsolver(
+                sat_process, timeout=getSolverTimeout(parameters))
+    except subprocess.TimeoutExpired:
+        solutions = None
+    connection.send(solutions)
+    connection.close()
+    return
+
+
+def startJob(function, cipher, parameters, weight):
+    """
+    Starts function(cipher, parameters, weight, connection) in a new process
+    and returns the process and the connection on which its result is
+    received. Each job has its own pipe, such that killing a job while it
+    sends its result can not block or corrupt the results of other jobs.
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    job = multiprocessing.Process(target=function, args=(
+        cipher, parameters, weight, sender))
+    job.start()
+    # Only the job writes to the pipe, receiving fails if it exits early
+    sender.close()
+    return job, receiver
+
+def receiveResult(running, timeout):
+    """
+    Waits up to timeout seconds for a job in running, which maps the
+    weights to the jobs and their connections. Returns the weight and the
+    result of a finished job, which is removed from running, or None if no
+    job finished. The result is None if the job exited without a result.
+    """
+    weights = {receiver : weight for weight, (_, receiver) in running.items()}
+    ready = multiprocessing.connection.wait(list(weights), timeout)
+    if not ready:
+        return None
+
+    weight = weights[ready[0]]
+    job, receiver = running.pop(weight)
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = None
+    receiver.close()
+    job.join()
+    return weight, result
+
+def cancelJob(job, receiver):
+    """
+    Terminates the job and its solver. The connection is discarded, as a
+    killed job may have left a partial result in it.
+    """
+    try:
+        os.killpg(job.pid, signal.SIGKILL)
+    except OSError:
+        job.kill()
+    job.join()
+    receiver.close()
+    return
+
+
+def printCharacteristic(cipher, parameters, characteristic, start_time):
+    """
+    Prints the characteristic found by the search for the minimal weight
+    and writes the .dot and .tex files if requested.
+    """
+    current_time = round(time.time() - start_time, 2)
+    print("---")
+    print(("Characteristic for {} - Rounds {} - Wordsize {} - "
+           "Weight {} - Time {}s".format(cipher.name,
+                                         parameters["rounds"],
+                                         parameters["wordsize"],
+                                         parameters["sweight"],
+                                         current_time)))
+    sys.stdout.flush()
+
+    characteristic.printText()
+    sys.stdout.flush()
+
+    if parameters["dot"]:
+        with open(parameters["dot"], "w") as dot_file:
+            dot_file.write("digraph graphname {")
+            dot_file.write(characteristic.getDOTString())
+            dot_file.write("}")
+        print("Wrote .dot to {}".format(parameters["dot"]))
+        sys.stdout.flush()
+
+    if parameters["latex"]:
+        with open(parameters["latex"], "w") as tex_file:
+            tex_file.write(characteristic.getTexString())
+        print("Wrote .tex to {}".format(parameters["latex"]))
+        sys.stdout.flush()
+    return
+
+
+def findAllCharacteristics(cipher, parameters):
+    """
+    Outputs all characteristics of a specific weight by excluding
+    solutions iteratively.
+    """
+    start_time = time.time()
+    setDeadline(start_time, parameters["timelimit"])
+
+    if parameters["incremental"]:
+        findAllCharacteristicsIncremental(cipher, parameters, start_time)
+    else:
+        total_num_characteristics = 0
+
+        while not reachedTimelimit(start_time, parameters["timelimit"]) and \
+              parameters["sweight"] != parameters["endweight"]:
+            # Start STP TODO: add boolector support
+            model = getModel(cipher, parameters)
+
+            try:
+                result = solveModel(model, parameters)
+            except subprocess.TimeoutExpired:
+                reportTimeout(parameters["sweight"])
+                break
+
+            # Check for solution
+            if foundSolution(result):
+                print(("Characteristic for {} - Rounds {} - Wordsize {}- "
+                       "Weight {}".format(cipher.name,
+                                          parameters["rounds"],
+                                          parameters["wordsize"],
+                                          parameters["sweight"])))
+                sys.stdout.flush()
+
+                characteristic = ""
+                if parameters["boolector"]:
+                    characteristic = parsesolveroutput.getCharBoolectorOutput(
+                        result, cipher, parameters["rounds"])
+                else:
+                    characteristic = parsesolveroutput.getCharSTPOutput(
+                        result, cipher, parameters["rounds"])
+
+                characteristic.printText()
+                sys.stdout.flush()
+                parameters["blockedCharacteristics"].append(characteristic)
+            else:
+                print("Found {} characteristics with weight {}".format(
+                    total_num_characteristics, parameters["sweight"]))
+                sys.stdout.flush()
+                parameters["sweight"] += 1
+                total_num_characteristics = 0
+                continue
+
+            total_num_characteristics += 1
 
     if parameters["dot"]:
         with open(parameters["dot"], "w") as dot_file:
@@ -326,6 +1173,73 @@ def findAllCharacteristics(cipher, parameters):
         
     return
 
+
+def findAllCharacteristicsIncremental(cipher, parameters, start_time):
+    """
+    Outputs all characteristics like findAllCharacteristics, but keeps a
+    single incremental SAT solver. The weight is passed as assumption and
+    each characteristic found is excluded by adding a blocking clause.
+    """
+    if stpcommands.weight_encoding == "counter":
+        print("ERROR: The counter weight encoding asserts the weight and "
+              "can not be used for the incremental search.")
+        exit(1)
+
+    # Construct the model once, the asserted weight is replaced by assumptions
+    model = stptocnf.CNFModel(["weight"])
+    model.parseString(generateModel(cipher, parameters))
+    if "weight" not in model.assumed_values:
+        print("ERROR: The model of {} does not assert the weight.".format(
+            cipher.name))
+        exit(1)
+
+    # Exclude everything but weight words, as in blockCharacteristic
+    blocked_vars = [name for name in model.variables
+                    if not name.startswith('w')]
+
+    solver = ipasir.IpasirSolver(PATH_IPASIR)
+    for clause in model.getDIMACSClauses():
+        solver.addClause(clause)
+
+    total_num_characteristics = 0
+    while not reachedTimelimit(start_time, parameters["timelimit"]) and \
+          parameters["sweight"] != parameters["endweight"]:
+        assumptions = model.getAssumptions("weight", parameters["sweight"])
+        result = False
+        if assumptions is not None:
+            solver.setTimeout(getSolverTimeout(parameters))
+            result = solver.solve(assumptions)
+        if result is None:
+            reportTimeout(parameters["sweight"])
+            break
+        if not result:
+            print("Found {} characteristics with weight {}".format(
+                total_num_characteristics, parameters["sweight"]))
+            sys.stdout.flush()
+            parameters["sweight"] += 1
+            total_num_characteristics = 0
+            continue
+
+        print(("Characteristic for {} - Rounds {} - Wordsize {}- "
+               "Weight {}".format(cipher.name,
+                                  parameters["rounds"],
+                                  parameters["wordsize"],
+                                  parameters["sweight"])))
+        sys.stdout.flush()
+
+        assignment = solver.getAssignment(model.getNumDIMACSVars())
+        characteristic = parsesolveroutput.getCharSTPOutput(
+            model.getSTPOutput(assignment), cipher, parameters["rounds"])
+        characteristic.printText()
+        sys.stdout.flush()
+        parameters["blockedCharacteristics"].append(characteristic)
+
+        solver.addClause(model.getBlockingClause(blocked_vars, assignment))
+        total_num_characteristics += 1
+
+    solver.release()
+    return
+
 def findOptimalCharacteristic(cipher, parameters):
     # use findcharacteristic to find all characteristics
     # iterate over all characteristics and calculate the probability of the differentials
@@ -335,12 +1249,31 @@ def findOptimalCharacteristic(cipher, parameters):
 def searchCharacteristics(cipher, parameters):
     """
     Searches for differential characteristics of minimal weight
-    for an increasing number of rounds.
+    for an increasing number of rounds, up to parameters["endrounds"].
+    The minimal weights of fewer rounds are asserted as lower bounds on the
+    weight of the first and last rounds.
     """
-    while True:
+    global _timed_out
+    bounds = {}
+    while parameters["endrounds"] == -1 or \
+          parameters["rounds"] <= parameters["endrounds"]:
         print("Number of rounds: {}".format(parameters["rounds"]))
         sys.stdout.flush()
+
+        # Fixed variables and iterative characteristics depend on the rounds
+        if not parameters["fixedVariables"] and not parameters["iterative"] \
+           and cipher.round_bounds_valid:
+            stpcommands.setRoundBounds(parameters["rounds"], bounds)
+
+        start_time = time.time()
+        _timed_out = False
         parameters["sweight"] = findMinWeightCharacteristic(cipher, parameters)
+
+        # Only weights which are proven to be minimal are bounds
+        if not _timed_out and (parameters["timelimit"] == -1 or \
+           time.time() - start_time < parameters["timelimit"]):
+            bounds[parameters["rounds"]] = parameters["sweight"]
+
         print("Rounds:")
         sys.stdout.flush()
         if cipher.name == "prince" or cipher.name == "mantis" or \
@@ -350,6 +1283,8 @@ def searchCharacteristics(cipher, parameters):
             parameters["rounds"] = parameters["rounds"] + 2
         else:
             parameters["rounds"] = parameters["rounds"] + 1
+
+    stpcommands.setRoundBounds(0, {})
     return
 
 def reachedTimelimit(start_time, timelimit):
@@ -362,60 +1297,567 @@ def reachedTimelimit(start_time, timelimit):
         return True
     return False
 
-def countSolutionsLogfile(logfile_path):
+def setDeadline(start_time, timelimit):
+    """
+    Solvers which are still running when the timelimit of the search
+    starting at start_time is reached are killed.
+    """
+    global _deadline
+    _deadline = None if timelimit == -1 else start_time + timelimit
+    return
+
+def reachedDeadline():
     """
-    Count the number of solutions in a CryptoMiniSat Logfile
+    Returns True if the deadline set with setDeadline has passed.
     """
-    with open(logfile_path, "r") as logfile:
-        logged_solutions = 0
-        for line in logfile:
-            if "s SATISFIABLE" in line:
-                logged_solutions += 1
-        return logged_solutions
-    return -1
+    return _deadline is not None and time.time() >= _deadline
+
+def getSolverTimeout(parameters):
+    """
+    Returns the number of seconds the next solver call may run, limited by
+    parameters["solvertimeout"] and the deadline of the search, or None if
+    there is no limit.
+    """
+    timeouts = []
+    if parameters["solvertimeout"] != -1:
+        timeouts.append(parameters["solvertimeout"])
+    if _deadline is not None:
+        timeouts.append(max(0, _deadline - time.time()))
+    return min(timeouts, default=None)
+
+def reportTimeout(weight):
+    """
+    Reports that the solver for the given weight was killed.
+    """
+    global _timed_out
+    _timed_out = True
+    print("Timed out at weight {}".format(weight))
+    sys.stdout.flush()
+    return
 
-def startSATsolver(stp_file):
+def runSolver(solver_parameters, timeout=None, input_data=None, check=False):
+    """
+    Runs the solver and returns its output. If the solver does not finish
+    within timeout seconds, it is killed and reaped and
+    subprocess.TimeoutExpired is raised. The solver is killed as well if
+    the search is interrupted.
+    """
+    solver_process = subprocess.Popen(
+        solver_parameters, stdout=subprocess.PIPE,
+        stdin=subprocess.PIPE if input_data is not None else None)
+    try:
+        output = solver_process.communicate(input=input_data,
+                                            timeout=timeout)[0]
+    except BaseException:
+        solver_process.kill()
+        solver_process.wait()
+        raise
+    if check and solver_process.returncode != 0:
+        raise subprocess.CalledProcessError(solver_process.returncode,
+                                            solver_parameters, output)
+    return output
+
+def countSolutionsSATsolver(sat_process, log_file=None, verbose=False,
+                            timeout=None):
+    """
+    Count the number of solutions printed by a CryptoMiniSat process. The
+    output is read in large chunks and only written to log_file if given.
+    If the process does not finish within timeout seconds, it is killed and
+    subprocess.TimeoutExpired is raised.
+    """
+    expired = threading.Event()
+    timer = None
+    if timeout is not None:
+        def killSATsolver():
+            expired.set()
+            sat_process.kill()
+        timer = threading.Timer(timeout, killSATsolver)
+        timer.start()
+
+    solutions = 0
+    tail = b""
+    try:
+        while True:
+            chunk = sat_process.stdout.read1(READ_SIZE)
+            if not chunk:
+                break
+            if log_file is not None:
+                log_file.write(chunk)
+
+            # A solution line can be split between two chunks
+            data = tail + chunk
+            solutions += data.count(SOLUTION_LINE)
+            tail = data[-(len(SOLUTION_LINE) - 1):]
+
+            if verbose:
+                print("\tSolutions: {}\r".format(solutions), end="")
+                sys.stdout.flush()
+    except BaseException:
+        # Do not leave the solver running if the search is interrupted
+        sat_process.kill()
+        raise
+    finally:
+        sat_process.wait()
+        if timer is not None:
+            timer.cancel()
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(sat_process.args, timeout)
+    return solutions
+
+def startSATsolver(model):
     """
-    Return CryptoMiniSat process started with the given stp_file.
+    Return CryptoMiniSat process started with the given STP model. The CNF
+    is constructed directly with the declared variables as sampling set,
+    such that every characteristic is enumerated exactly once, and is
+    written to the stdin of the solver.
     """
-    # Start STP to construct CNF
-    subprocess.check_output([PATH_STP, "--exit-after-CNF", "--output-CNF",
-                             stp_file, "--CVC", "--disable-simplifications"])
+    cnf_model = stptocnf.CNFModel()
+    cnf_model.parseString(model)
+    dimacs = cnf_model.getDIMACS(sampling=True).encode("utf-8")
 
     # Find the number of solutions with the SAT solver
     sat_params = [PATH_CRYPTOMINISAT, "--maxsol", str(MAX_CHARACTERISTICS),
-                  "--verb", "0", "-s", "0", "output_0.cnf"]
+                  "--onlysampling", "--verb", "0", "-s", "0"]
 
-    sat_process = subprocess.Popen(sat_params, stderr=subprocess.PIPE,
+    sat_process = subprocess.Popen(sat_params, stdin=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
                                    stdout=subprocess.PIPE)
 
+    # The solver prints solutions while the CNF is written, which must be
+    # read concurrently to not block
+    writer = threading.Thread(target=writeInput,
+                              args=(sat_process.stdin, dimacs))
+    writer.daemon = True
+    writer.start()
+
     return sat_process
 
-def solveSTP(stp_file):
+def writeInput(pipe, data):
+    """
+    Writes the data to the pipe and closes it. A solver which is killed
+    before it has read all of its input is ignored.
+    """
+    try:
+        pipe.write(data)
+        pipe.close()
+    except (BrokenPipeError, ValueError):
+        pass
+    return
+
+def countSolutionsApproxMC(model, parameters):
+    """
+    Returns the number of characteristics of the given STP model estimated
+    by ApproxMC with the tolerance parameters["epsilon"] and confidence
+    parameters["delta"].
+    """
+    cnf_model = stptocnf.CNFModel()
+    cnf_model.parseString(model)
+    dimacs = cnf_model.getDIMACS(sampling=True)
+
+    approxmc_params = [PATH_APPROXMC, "--verb", "0",
+                       "--epsilon", str(parameters["epsilon"]),
+                       "--delta", str(parameters["delta"])]
+    result = runSolver(approxmc_params, getSolverTimeout(parameters),
+                       input_data=dimacs.encode("utf-8"))
+
+    solutions = parsesolveroutput.getApproximateCount(result.decode("utf-8"))
+    if solutions is None:
+        print("ERROR: Could not parse the output of ApproxMC")
+        exit(1)
+    return solutions
+
+def solveModel(model, parameters):
+    """
+    Returns the solution for the given SMT problem using the solver
+    selected in the parameters.
+    """
+    timeout = getSolverTimeout(parameters)
+    if parameters["portfolio"]:
+        return solvePortfolio(model, parameters, timeout)
+    if parameters["boolector"]:
+        return solveBoolector(model, timeout)
+    if parameters["cnf"]:
+        return solveCNF(model, timeout)
+    return solveSTP(model, timeout)
+
+def solveSTP(model, timeout=None, cache=True):
+    """
+    Returns the solution for the given SMT problem using STP, which reads
+    the model from stdin. Results are looked up in and added to the disk
+    cache unless cache is False.
+    """
+    stp_parameters = [PATH_STP, "--CVC"]
+    input_data = model.encode("utf-8")
+    key = getResultCacheKey(stp_parameters, input_data) if cache else None
+    result = loadCachedResult(key)
+    if result is not None:
+        return result
+
+    result = runSolver(stp_parameters, timeout, input_data=input_data,
+                       check=True).decode("utf-8")
+    storeCachedResult(key, result)
+    return result
+
+def solveBoolector(model, timeout=None, cache=True):
+    """
+    Returns the solution for the given SMT problem using boolector on the
+    model translated into SMT-LIB2. Results are looked up in and added to
+    the disk cache unless cache is False.
+    """
+    boolector_parameters = [PATH_BOOLECTOR, "-x"]
+    input_data = stptosmt.getSMTLIB2(model).encode("utf-8")
+    key = getResultCacheKey(boolector_parameters, input_data) if cache \
+          else None
+    result = loadCachedResult(key)
+    if result is not None:
+        return result
+
+    result = runSolver(boolector_parameters, timeout,
+                       input_data=input_data).decode("utf-8")
+    # Only definitive answers are cached, not errors of the solver
+    if any(answer in ["sat", "unsat"] for answer in result.split()):
+        storeCachedResult(key, result)
+    return result
+
+def getSolverIdentity(path):
+    """
+    Returns a string identifying the build of the solver, which changes
+    whenever the binary is replaced.
+    """
+    if path not in _solver_identities:
+        real_path = os.path.realpath(path)
+        try:
+            status = os.stat(real_path)
+            _solver_identities[path] = "{}:{}:{}".format(
+                real_path, status.st_size, status.st_mtime_ns)
+        except OSError:
+            _solver_identities[path] = real_path
+    return _solver_identities[path]
+
+def getResultCacheKey(solver_parameters, input_data):
+    """
+    Returns the key of the result of the solver for the input in the disk
+    cache, or None if the cache is disabled.
+    """
+    if RESULT_CACHE_SIZE <= 0:
+        return None
+    digest = hashlib.sha256()
+    digest.update(getSolverIdentity(solver_parameters[0]).encode("utf-8"))
+    for argument in solver_parameters[1:]:
+        digest.update(b"\0" + argument.encode("utf-8"))
+    digest.update(b"\0\0")
+    digest.update(input_data)
+    return digest.hexdigest()
+
+def loadCachedResult(key):
     """
-    Returns the solution for the given SMT problem using STP.
+    Returns the cached result for the key, or None if it is not cached. A
+    hit marks the entry as recently used.
     """
-    stp_parameters = [PATH_STP, stp_file, "--CVC"]
-    result = subprocess.check_output(stp_parameters)
+    if key is None:
+        return None
+    filename = os.path.join(PATH_RESULT_CACHE, key + ".z")
+    try:
+        with open(filename, "rb") as cache_file:
+            result = zlib.decompress(cache_file.read()).decode("utf-8")
+        os.utime(filename)
+    except (OSError, zlib.error):
+        # Missing, evicted by another run or corrupted
+        return None
+    return result
+
+def storeCachedResult(key, result):
+    """
+    Adds the result to the disk cache. The file is replaced atomically so
+    that concurrent runs never see a partial file. If the cache grows beyond
+    RESULT_CACHE_SIZE bytes, the least recently used entries are removed.
 
-    return result.decode("utf-8")
+    The directory is only scanned once and whenever the size, counted up
+    from the stored results, exceeds RESULT_CACHE_SIZE. Results stored by
+    concurrent runs are counted at the next scan.
+    """
+    global _result_cache_size
+    if key is None:
+        return
+    filename = os.path.join(PATH_RESULT_CACHE, key + ".z")
+    tmp_filename = "{}.{}.tmp".format(filename, os.getpid())
+    data = zlib.compress(result.encode("utf-8"))
+    try:
+        os.makedirs(PATH_RESULT_CACHE, exist_ok=True)
+        with open(tmp_filename, "wb") as cache_file:
+            cache_file.write(data)
+        os.replace(tmp_filename, filename)
+        if _result_cache_size is None:
+            _result_cache_size = evictCachedResults()
+        else:
+            _result_cache_size += len(data)
+        if _result_cache_size > RESULT_CACHE_SIZE:
+            _result_cache_size = evictCachedResults()
+    except OSError:
+        # The cache is optional, the solver is run again next time
+        pass
+    return
 
-def solveBoolector(stp_file):
+def evictCachedResults():
+    """
+    Removes the least recently used results until the cache is below
+    three quarters of RESULT_CACHE_SIZE, once it exceeds RESULT_CACHE_SIZE.
+    Returns the size of the remaining results.
+    """
+    entries = []
+    total_size = 0
+    for entry in os.scandir(PATH_RESULT_CACHE):
+        if not entry.name.endswith(".z"):
+            continue
+        try:
+            status = entry.stat()
+        except OSError:
+            continue
+        entries.append((status.st_mtime, status.st_size, entry.path))
+        total_size += status.st_size
+    if total_size <= RESULT_CACHE_SIZE:
+        return total_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total_size <= RESULT_CACHE_SIZE * 3 // 4:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total_size -= size
+    return total_size
+
+def solveCNF(model, timeout=None):
+    """
+    Returns the solution for the given SMT problem using CryptoMiniSat on
+    the CNF constructed directly from the model. The result has the same
+    format as the output of STP.
+    """
+    cnf_model = stptocnf.CNFModel()
+    cnf_model.parseString(model)
+    dimacs = cnf_model.getDIMACS()
+
+    sat_parameters = [PATH_CRYPTOMINISAT, "--verb", "0"]
+    result = runSolver(sat_parameters, timeout,
+                       input_data=dimacs.encode("utf-8")).decode("utf-8")
+
+    if "s UNSATISFIABLE" in result:
+        return "Valid.\n"
+    if "s SATISFIABLE" not in result:
+        # Crashed or killed solvers print no solution line
+        print("ERROR: CryptoMiniSat gave no answer for the CNF model")
+        exit(1)
+    assignment = parsesolveroutput.getAssignmentSATOutput(result)
+    return cnf_model.getSTPOutput(assignment)
+
+def solvePortfolio(model, parameters, timeout=None):
+    """
+    Returns the solution for the given SMT problem in the format of STP,
+    racing the backends in parameters["portfolio"]. The first definitive
+    answer is returned and the other solvers are killed. If one backend has
+    won enough races for the cipher, it is used without racing.
     """
-    Returns the solution for the given SMT problem using boolector.
+    backends = parameters["portfolio"]
+    favourite = loadPortfolioWinner(parameters, backends)
+    if favourite is not None and len(backends) > 1:
+        winner, result = raceBackends([favourite], model, timeout)
+        if winner is not None:
+            return result
+
+    winner, result = raceBackends(backends, model, timeout)
+    if winner is None:
+        print("ERROR: No solver of the portfolio {} gave an answer".format(
+            ",".join(backends)))
+        exit(1)
+    if len(backends) > 1:
+        storePortfolioWin(parameters, winner)
+    return result
+
+def raceBackends(backends, model, timeout=None):
     """
-    # Create input file with help of STP
-    stp_parameters = [PATH_STP, "--print-back-SMTLIB2", stp_file, "--CVC"]
-    input_file = subprocess.check_output(stp_parameters)
+    Starts the solvers of all backends on the model and returns the first
+    backend with a definitive answer and the answer in the format of STP,
+    or (None, None) if no solver gave an answer. All solvers are killed
+    when the race is over.
+    """
+    if timeout is not None:
+        timeout += time.time()
+    results = queue.Queue()
+    processes = []
+    try:
+        for backend in backends:
+            command, input_data, convert = getBackendCall(backend, model)
+            process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.DEVNULL)
+            processes.append(process)
+            collector = threading.Thread(target=collectBackendResult, args=(
+                backend, process, input_data, convert, results))
+            collector.daemon = True
+            collector.start()
+
+        for _ in backends:
+            wait_time = None
+            if timeout is not None:
+                wait_time = max(0, timeout - time.time())
+            try:
+                backend, result = results.get(timeout=wait_time)
+            except queue.Empty:
+                raise subprocess.TimeoutExpired(backends, wait_time)
+            if result is not None:
+                return backend, result
+        return None, None
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait()
+
+def collectBackendResult(backend, process, input_data, convert, results):
+    """
+    Waits for the solver of the backend and puts the backend and its
+    converted answer in the queue, where the answer is None if the solver
+    failed or was killed.
+    """
+    try:
+        output = process.communicate(input=input_data)[0]
+    except (BrokenPipeError, ValueError):
+        output = b""
+    results.put((backend, convert(output.decode("utf-8"))))
+    return
 
-    boolector_parameters = [PATH_BOOLECTOR, "-x", "-m"]
-    boolector_process = subprocess.Popen(boolector_parameters,
-                                         stdout=subprocess.PIPE,
-                                         stdin=subprocess.PIPE)
+def getBackendCall(backend, model):
+    """
+    Returns the command line of the solver of the backend, its input for
+    the model and a function, which converts its output into the format of
+    STP or None if the output contains no answer. The backend cnf:N runs
+    CryptoMiniSat with the random seed N.
+    """
+    name, _, seed = backend.partition(":")
+    if name == "stp":
+        return [PATH_STP, "--CVC"], model.encode("utf-8"), convertSTPOutput
+    if name == "boolector":
+        smt_model = stptosmt.getSMTLIB2(model)
+        return [PATH_BOOLECTOR, "-x"], smt_model.encode("utf-8"), \
+               convertSMTOutput
+
+    cnf_model = stptocnf.CNFModel()
+    cnf_model.parseString(model)
+    sat_parameters = [PATH_CRYPTOMINISAT, "--verb", "0"]
+    if seed:
+        sat_parameters += ["--random", seed]
+    convert = functools.partial(convertSATOutput, cnf_model)
+    return sat_parameters, cnf_model.getDIMACS().encode("utf-8"), convert
+
+def convertSTPOutput(output):
+    """
+    Returns the output of STP, or None if it contains no answer.
+    """
+    if "Valid." not in output and "Invalid." not in output:
+        return None
+    return output
 
-    result = boolector_process.communicate(input=input_file)[0]
+def convertSMTOutput(output):
+    """
+    Returns the model printed by an SMT solver in the format of STP, or None
+    if the output contains no answer.
+    """
+    answer = output.split()
+    if "unsat" in answer:
+        return "Valid.\n"
+    if "sat" not in answer:
+        return None
+    return "".join("ASSERT( {} = {} );\n".format(name, value) for name, value
+                   in parsesolveroutput.getValuesSMTOutput(output).items())
+
+def convertSATOutput(cnf_model, output):
+    """
+    Returns the solution of CryptoMiniSat for the CNF model in the format of
+    STP, or None if the output contains no answer.
+    """
+    if "s UNSATISFIABLE" in output:
+        return "Valid.\n"
+    if "s SATISFIABLE" not in output:
+        return None
+    assignment = parsesolveroutput.getAssignmentSATOutput(output)
+    return cnf_model.getSTPOutput(assignment)
+
+def getBackendPath(backend):
+    """
+    Returns the path of the solver of the backend, or None if there is no
+    such backend.
+    """
+    paths = {"stp" : PATH_STP, "boolector" : PATH_BOOLECTOR,
+             "cnf" : PATH_CRYPTOMINISAT}
+    name, _, seed = backend.partition(":")
+    if seed and (name != "cnf" or not seed.isdigit()):
+        return None
+    return paths.get(name)
+
+def getPortfolioCacheKey(parameters):
+    """
+    Returns the key and the file of the races won by each backend for the
+    cipher and number of rounds.
+    """
+    key = "{};{};{};{};{}".format(parameters["cipher"], parameters["wordsize"],
+                                  parameters["blocksize"], parameters["rounds"],
+                                  stpcommands.weight_encoding)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return key, os.path.join(PATH_PORTFOLIO_CACHE, "{}.txt".format(digest))
 
-    return result.decode("utf-8")
+def loadPortfolioWins(parameters):
+    """
+    Returns the number of races won by each backend from the disk cache.
+    """
+    key, filename = getPortfolioCacheKey(parameters)
+    if not os.path.isfile(filename):
+        return {}
+
+    with open(filename, "r") as cache_file:
+        # First line contains the key to detect collisions
+        if cache_file.readline().strip() != key:
+            return {}
+        wins = {}
+        for line in cache_file:
+            backend, count = line.split()
+            wins[backend] = int(count)
+        return wins
+
+def loadPortfolioWinner(parameters, backends):
+    """
+    Returns the backend which won the most races for the cipher and number
+    of rounds, or None if it did not win PORTFOLIO_MIN_WINS races yet.
+    """
+    wins = {backend : count for backend, count
+            in loadPortfolioWins(parameters).items() if backend in backends}
+    if not wins:
+        return None
+    winner = max(wins, key=wins.get)
+    if wins[winner] < PORTFOLIO_MIN_WINS:
+        return None
+    return winner
+
+def storePortfolioWin(parameters, backend):
+    """
+    Counts a race won by the backend in the disk cache. The file is replaced
+    atomically so that concurrent runs never see a partial file.
+    """
+    wins = loadPortfolioWins(parameters)
+    wins[backend] = wins.get(backend, 0) + 1
+    key, filename = getPortfolioCacheKey(parameters)
+    tmp_filename = "{}.{}.tmp".format(filename, os.getpid())
+    try:
+        os.makedirs(PATH_PORTFOLIO_CACHE, exist_ok=True)
+        with open(tmp_filename, "w") as cache_file:
+            cache_file.write(key + "\n")
+            for name, count in sorted(wins.items()):
+                cache_file.write("{} {}\n".format(name, count))
+        os.replace(tmp_filename, filename)
+    except OSError:
+        # The cache is optional, the backends race again next time
+        pass
+    return
 
 def foundSolution(solver_result):
     """
@@ -425,14 +1867,47 @@ def foundSolution(solver_result):
 
 def findOptimalTrailsMatsui(cipher, parameters):
     """
-    Computes the optimal differential trail probability using matsui's algorithm
+    Computes the minimal weight of a differential trail for up to the given
+    number of rounds with Matsui's branch-and-bound algorithm. The minimal
+    weight of each number of rounds bounds the search for the next one.
     """
-    matsuisAlgorithm = matsui.MatsuisAlgorithm()
+    if not hasattr(cipher, "getSPNDescription"):
+        print("ERROR: Matsui's algorithm needs the S-box and permutation of "
+              "the cipher, which {} does not provide.".format(cipher.name))
+        exit(1)
 
-    # do some precomputations
-    matsuisAlgorithm.calculateDifferentialDistributionTable(cipher)
+    print(("Starting search with Matsui's algorithm\n"
+           "{} - Rounds: {} Wordsize: {}".format(cipher.name,
+                                                 parameters["rounds"],
+                                                 parameters["wordsize"])))
+    print("---")
+    sys.stdout.flush()
+
+    start_time = time.time()
+    sbox, sbox_bits, permutation = cipher.getSPNDescription(parameters)
+    matsuisAlgorithm = matsui.MatsuisAlgorithm(sbox, sbox_bits, permutation)
+
+    trail = None
+    for rounds in range(1, parameters["rounds"] + 1):
+        if reachedTimelimit(start_time, parameters["timelimit"]):
+            print("Reached time limit after {} rounds.".format(rounds - 1))
+            break
+        weight, trail = matsuisAlgorithm.findOptimalTrail(rounds, MAX_WEIGHT)
+        if trail is None:
+            print("No trail with weight below {} for {} rounds.".format(
+                MAX_WEIGHT, rounds))
+            break
+        print("Rounds: {} Weight: {} Time: {}s".format(
+            rounds, weight, round(time.time() - start_time, 2)))
+        sys.stdout.flush()
 
-    # run Matsui's algorithm
-    matsuisAlgorithm.procedure_round_1(cipher)
+    if trail is not None:
+        parameters["rounds"] = len(trail)
+        parameters["sweight"] = matsuisAlgorithm.bounds[len(trail)]
+        data = matsuisAlgorithm.getCharacteristicData(
+            trail, cipher.getFormatString(), len(permutation))
+        characteristic = diffchars.DifferentialCharacteristic(
+            data, cipher, len(trail), hex(parameters["sweight"]))
+        printCharacteristic(cipher, parameters, characteristic, start_time)
 
-    return 
+    return matsuisAlgorithm.bounds[1:]
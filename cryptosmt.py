@@ -15,12 +15,15 @@ from ciphers import (simon, speck, simonlinear, keccak, keccakdiff,
                      sparxround3r, sparxround4r, sparxround5r,
                      sparxround6r)
 
-from config import PATH_STP, PATH_CRYPTOMINISAT, PATH_BOOLECTOR
+from config import (PATH_STP, PATH_CRYPTOMINISAT, PATH_BOOLECTOR,
+                    PATH_IPASIR, PATH_APPROXMC)
+from parser import stpcommands
 
 from argparse import ArgumentParser, RawTextHelpFormatter
 
 import yaml
 import os
+import signal
 import sys
 
 
@@ -80,6 +83,12 @@ def startsearch(tool_parameters):
         sys.stdout.flush()
         return
 
+    # Without --weightencoding the fastest encoding measured by benchmark.py
+    if tool_parameters["weightencoding"] is None:
+        tool_parameters["weightencoding"] = \
+            stpcommands.getDefaultWeightEncoding(cipher.name)
+    stpcommands.setWeightEncoding(tool_parameters["weightencoding"])
+
     # Handle program flow
     if tool_parameters["mode"] == 0:
         search.findMinWeightCharacteristic(cipher, tool_parameters)
@@ -98,7 +107,7 @@ def startsearch(tool_parameters):
 
     return
 
-def checkenviroment():
+def checkenviroment(params):
     """
     Basic checks if the enviroment is set up correctly
     """
@@ -106,7 +115,56 @@ def checkenviroment():
     if not os.path.exists("./tmp/"):
         os.makedirs("./tmp/")
 
-    if not os.path.exists(PATH_STP):
+    if params["mode"] == 5:
+        # Matsui's algorithm does not need any solver
+        pass
+    elif params["incremental"]:
+        # The incremental search does not need STP
+        if not os.path.exists(PATH_IPASIR):
+            print("ERROR: Could not find IPASIR library, please check "
+                  "config.py")
+            sys.stdout.flush()
+            exit()
+    elif params["mode"] == 4 and params["counter"] == "approxmc":
+        if not os.path.exists(PATH_APPROXMC):
+            print("ERROR: Could not find APPROXMC binary, please check "
+                  "config.py")
+            sys.stdout.flush()
+            exit()
+    elif params["portfolio"] and params["mode"] != 4:
+        # Each backend of the portfolio needs its own solver
+        if params["boolector"] or params["cnf"]:
+            print("ERROR: \"--portfolio\" can not be combined with "
+                  "\"--boolector\" or \"--cnf\"")
+            sys.stdout.flush()
+            exit()
+        for backend in params["portfolio"]:
+            path = search.getBackendPath(backend)
+            if path is None:
+                print("ERROR: Unknown backend {} in the portfolio, use stp, "
+                      "boolector or cnf:SEED".format(backend))
+                sys.stdout.flush()
+                exit()
+            if not os.path.exists(path):
+                print("ERROR: Could not find the solver {} of the backend {}, "
+                      "please check config.py".format(path, backend))
+                sys.stdout.flush()
+                exit()
+    elif params["boolector"] and params["mode"] != 4:
+        # The models are translated to SMT-LIB2 without STP
+        if not os.path.exists(PATH_BOOLECTOR):
+            print("ERROR: Could not find BOOLECTOR binary, please check "
+                  "config.py")
+            sys.stdout.flush()
+            exit()
+    elif params["cnf"] or params["mode"] == 4:
+        # The CNF backend and the counting of mode 4 do not need STP
+        if not os.path.exists(PATH_CRYPTOMINISAT):
+            print("ERROR: Could not find CRYPTOMINISAT binary, please check "
+                  "config.py")
+            sys.stdout.flush()
+            exit()
+    elif not os.path.exists(PATH_STP):
         print("ERROR: Could not find STP binary, please check config.py")
         sys.stdout.flush()
         exit()
@@ -136,19 +194,31 @@ def loadparameters(args):
               "blocksize" : 64,
               "sweight" : 0,
               "endweight" : 1000,
+              "endrounds" : -1,
               "iterative" : False,
               "boolector" : False,
+              "cnf" : False,
+              "portfolio" : [],
+              "incremental" : False,
+              "parallel" : 1,
+              "strategy" : "linear",
+              "counter" : "exact",
+              "epsilon" : 0.8,
+              "delta" : 0.2,
+              "satlog" : False,
               "dot" : None,
               "latex" : None,
               "nummessages" : 1,
               "timelimit" : -1,
+              "solvertimeout" : -1,
               "fixedVariables" : {},
               "blockedCharacteristics" : [],
               "rate" : 160,
               "capacity" : 240,
               "keysize" : 64,
               "tweaksize" : 64,
-              "skipround" : -10}
+              "skipround" : -10,
+              "weightencoding" : None}
 
     # Check if there is an input file specified
     if args.inputfile:
@@ -181,18 +251,51 @@ def loadparameters(args):
     if args.endweight:
         params["endweight"] = args.endweight[0]
 
+    if args.endrounds:
+        params["endrounds"] = args.endrounds[0]
+
     if args.mode:
         params["mode"] = args.mode[0]
 
     if args.timelimit:
         params["timelimit"] = args.timelimit[0]
 
+    if args.solvertimeout:
+        params["solvertimeout"] = args.solvertimeout[0]
+
     if args.iterative:
         params["iterative"] = args.iterative
 
     if args.boolector:
         params["boolector"] = args.boolector
 
+    if args.cnf:
+        params["cnf"] = args.cnf
+
+    if args.portfolio:
+        params["portfolio"] = args.portfolio[0].split(",")
+
+    if args.incremental:
+        params["incremental"] = args.incremental
+
+    if args.parallel:
+        params["parallel"] = args.parallel[0]
+
+    if args.strategy:
+        params["strategy"] = args.strategy[0]
+
+    if args.counter:
+        params["counter"] = args.counter[0]
+
+    if args.epsilon:
+        params["epsilon"] = args.epsilon[0]
+
+    if args.delta:
+        params["delta"] = args.delta[0]
+
+    if args.satlog:
+        params["satlog"] = args.satlog
+
     if args.nummessages:
         params["nummessages"] = args.nummessages[0]
 
@@ -217,6 +320,9 @@ def loadparameters(args):
     if args.skipround:
         params["skipround"] = int(args.skipround[0])
 
+    if args.weightencoding:
+        params["weightencoding"] = args.weightencoding[0]
+
     return params
 
 
@@ -235,6 +341,8 @@ def main():
                         help="Starting weight for the trail search.")
     parser.add_argument('--endweight', nargs=1, type=int,
                         help="Stop search after reaching endweight.")
+    parser.add_argument('--endrounds', nargs=1, type=int,
+                        help="Stop mode 1 after this number of rounds.")
     parser.add_argument('--rounds', nargs=1, type=int,
                         help="The number of rounds for the cipher")
     parser.add_argument('--wordsize', nargs=1, type=int,
@@ -252,13 +360,60 @@ def main():
                         "3 = used for key recovery\n"
                         "4 = determine the probability of the differential\n"
                         "5 = calculate best differential probability using matsui's algorithm\n"
+                        "    (present, gift, rectangle)\n"
                         "6 = search best constants for chaskey\n")
     parser.add_argument('--timelimit', nargs=1, type=int,
-                        help="Set a timelimit for the search in seconds.")
+                        help="Set a timelimit for the search in seconds. "
+                             "Running solvers are killed at the limit.")
+    parser.add_argument('--solvertimeout', nargs=1, type=int,
+                        help="Kill a single solver call after this many "
+                             "seconds and stop at the weight it was "
+                             "solving.")
     parser.add_argument('--iterative', action="store_true",
                         help="Only search for iterative characteristics")
     parser.add_argument('--boolector', action="store_true",
                         help="Use boolector to find solutions")
+    parser.add_argument('--cnf', action="store_true",
+                        help="Construct the CNF directly and solve it with "
+                             "CryptoMiniSat\ninstead of using STP")
+    parser.add_argument('--portfolio', nargs=1,
+                        help="Race several backends on each weight and use "
+                             "the first answer,\ne.g. stp,boolector,cnf:1,"
+                             "cnf:2 where cnf:N runs CryptoMiniSat\nwith "
+                             "the random seed N. The winners are recorded "
+                             "in\nPATH_PORTFOLIO_CACHE to skip the race "
+                             "later.")
+    parser.add_argument('--incremental', action="store_true",
+                        help="Use an incremental SAT solver to search the "
+                             "minimal\nweight and all characteristics (mode "
+                             "0 and 2),\nsee PATH_IPASIR in config.py")
+    parser.add_argument('--parallel', nargs=1, type=int,
+                        help="Number of weights which are tested or "
+                             "counted\nconcurrently (mode 0 and 4), or of "
+                             "rotation constants\nwhich are searched "
+                             "concurrently (mode 3 and 6).")
+    parser.add_argument('--strategy', nargs=1,
+                        choices=["linear", "descend", "gallop"], help=
+                        "Search strategy for the minimal weight:\n"
+                        "linear = test each weight from sweight on (default)\n"
+                        "descend = lower an upper bound on the weight\n"
+                        "gallop = raise the bound in doubling steps, then "
+                        "binary search\n")
+    parser.add_argument('--counter', nargs=1, choices=["exact", "approxmc"],
+                        help=
+                        "Counting of the characteristics in mode 4:\n"
+                        "exact = enumerate all with CryptoMiniSat (default)\n"
+                        "approxmc = estimate the number with ApproxMC, see\n"
+                        "PATH_APPROXMC in config.py\n")
+    parser.add_argument('--epsilon', nargs=1, type=float,
+                        help="Tolerance of the estimates of ApproxMC "
+                             "(default 0.8).")
+    parser.add_argument('--delta', nargs=1, type=float,
+                        help="Probability that an estimate of ApproxMC is "
+                             "outside\nthe tolerance (default 0.2).")
+    parser.add_argument('--satlog', action="store_true",
+                        help="Keep the output of CryptoMiniSat in "
+                             "tmp/satlog*.tmp (mode 4).")
     parser.add_argument('--inputfile', nargs=1, help="Use an yaml input file to"
                                                      "read the parameters.")
     parser.add_argument('--dot', nargs=1, help="Print the trail in .dot format.")
@@ -268,13 +423,25 @@ def main():
     parser.add_argument('--keysize', nargs=1, help="Key size used for the cipher")
     parser.add_argument('--tweaksize', nargs=1, help="Tweak size used for the cipher")
     parser.add_argument('--skipround', nargs=1, help="Define some rounds to skip")
+    parser.add_argument('--weightencoding', nargs=1,
+                        choices=stpcommands.WEIGHT_ENCODINGS, help=
+                        "Encoding of the weight computation:\n"
+                        "bvplus = sum of the weight of each word\n"
+                        "tree = balanced adder tree over all bits\n"
+                        "counter = sequential counter bounding the weight\n"
+                        "Default: the faster of bvplus and tree for the "
+                        "cipher\nstored in PATH_WEIGHT_ENCODINGS by "
+                        "benchmark.py or bvplus\n")
 
     # Parse command line arguments and construct parameter list.
     args = parser.parse_args()
     params = loadparameters(args)
 
+    # Exit normally on SIGTERM, such that solvers are killed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+
     # Check if enviroment is setup correctly.
-    checkenviroment()
+    checkenviroment(params)
 
     # Start the solver
     startsearch(params)
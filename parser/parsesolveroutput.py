@@ -7,26 +7,52 @@ Created on Mar 28, 2014
 from cryptanalysis import diffchars
 import re
 
+# Value of a bitvector in the output of (get-model)
+DEFINE_FUN_REGEX = re.compile(r"\(define-fun\s+(\w+)\s+\(\)\s+"
+                              r"\(_\s+BitVec\s+(\d+)\)\s+"
+                              r"(#x[0-9a-fA-F]+|#b[01]+|"
+                              r"\(_\s+bv(\d+)\s+\d+\))\s*\)")
+
 
 def getCharBoolectorOutput(output, cipher, rounds):
     """
-    Parse the output of Boolector and construct a characteristic.
+    Parse the model printed by Boolector, or any other SMT solver, for the
+    (get-model) command and construct a characteristic.
     """
-    characteristic = {}
-    weight = "0"
-
-    for row in output.split('\n'):
-        if re.match(r'.*weight', row):
-            weight = row.split(" ")[1]
-        elif re.match(r'\d*\s.*\s.*', row):
-            var_name = row.split(" ")[2]
-            var_value = "0x" + row.split(" ")[1]
-            characteristic[var_name] = var_value
+    characteristic = getValuesSMTOutput(output)
+    weight = characteristic.pop("weight", "0")
 
     return diffchars.DifferentialCharacteristic(characteristic,
                                                 cipher, rounds, weight)
 
 
+def getValuesSMTOutput(output):
+    """
+    Returns the values of the bitvectors in the model printed for the
+    (get-model) command, in the same format as the counterexample printed
+    by STP.
+    """
+    values = {}
+
+    for match in DEFINE_FUN_REGEX.finditer(output):
+        var_name = match.group(1)
+        width = int(match.group(2))
+        value = match.group(3)
+        if value.startswith("#x"):
+            value = int(value[2:], 16)
+        elif value.startswith("#b"):
+            value = int(value[2:], 2)
+        else:
+            value = int(match.group(4))
+
+        if width % 4 == 0:
+            values[var_name] = "0x{:0{}X}".format(value, width // 4)
+        else:
+            values[var_name] = "0b{:0{}b}".format(value, width)
+
+    return values
+
+
 def getCharSTPOutput(output, cipher, rounds):
     """
     Parse the output of STP and construct a characteristic.
@@ -35,13 +61,44 @@ def getCharSTPOutput(output, cipher, rounds):
     weight = "0"
 
     for row in output.split('\n'):
-        if re.match(r'ASSERT.*weight', row):
+        if re.match(r'ASSERT\( weight = ', row):
             weight = re.search(r'(?<=ASSERT\( weight = ).*(?= \);)', row).group(0)
         elif re.match(r'ASSERT\(.*\)', row):
-            tmp = re.search(r'ASSERT\( ([a-z0-9A-Z]+) = ([a-z0-9A-Z]+)', row)
+            tmp = re.search(r'ASSERT\( ([a-z0-9A-Z_]+) = ([a-z0-9A-Z]+)', row)
             var_name = tmp.group(1)
             var_value = tmp.group(2)
             characteristic[var_name] = var_value
 
     return diffchars.DifferentialCharacteristic(characteristic,
                                                 cipher, rounds, weight)
+
+
+def getAssignmentSATOutput(output):
+    """
+    Parse the output of a SAT solver in the DIMACS format and return the
+    set of variables which are true, or None if there is no solution.
+    """
+    assignment = set()
+    for row in output.split('\n'):
+        if row.startswith("s UNSATISFIABLE"):
+            return None
+        if row.startswith("v "):
+            assignment.update(int(literal) for literal in row.split()[1:]
+                              if int(literal) > 0)
+    return assignment
+
+
+def getApproximateCount(output):
+    """
+    Parse the output of ApproxMC and return the estimated number of
+    solutions, or None if the output contains no estimate.
+    """
+    for row in output.split('\n'):
+        if row.startswith("s mc "):
+            return int(row.split()[2])
+        # Output of older versions
+        match = re.search(r'Number of solutions is: (\d+)\s*\*\s*2\*\*(\d+)',
+                          row)
+        if match:
+            return int(match.group(1)) * 2**int(match.group(2))
+    return None
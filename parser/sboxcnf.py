@@ -0,0 +1,292 @@
+'''
+Created on Oct 18, 2026
+
+Provides the CNF encoding of the differential behaviour of S-boxes. The
+clauses for an S-box only depend on the S-box table and the encoding, so they
+are computed once and cached in memory and on disk. Only the variable names
+are substituted for each S-box in a model.
+@author: stefan
+'''
+
+from config import PATH_SBOX_CACHE
+from cryptanalysis import sboxtables
+
+import hashlib
+import os
+
+# Clauses for each (encoding, S-box) computed in this process
+_clauses = {}
+
+# STP format strings for each (encoding, S-box) computed in this process
+_templates = {}
+
+# Weights of DDT entries which are not a power of two for each encoding.
+# The exhaustive encoding of 4-bit S-boxes only allows transitions with an
+# exact integer weight. For 8-bit S-boxes like SKINNY-128 many entries are
+# not a power of two, the minimized encoding rounds their weight down such
+# that the minimum weight of a characteristic is a lower bound.
+WEIGHT_ROUNDING = {"exhaustive" : "exclude", "minimized" : "down"}
+
+
+def getSboxWeights(sbox, rounding="exclude"):
+    """
+    Returns a dictionary which maps each valid transition
+    (input difference << n) | output difference of the n-bit S-box to its
+    weight -log2(DDT[input][output] / 2^n).
+
+    DDT entries which are not a power of two have no integer weight, they
+    are excluded or their weight is rounded down, see WEIGHT_ROUNDING.
+    """
+    n = sboxtables.getSboxSize(sbox)
+    table = sboxtables.getDifferentialWeights(sbox, rounding=rounding)
+
+    weights = {}
+    for input_diff, row in enumerate(table):
+        for output_diff, weight in enumerate(row):
+            if weight is not None:
+                weights[(input_diff << n) | output_diff] = weight
+    return weights
+
+
+def getSboxTransitions(sbox):
+    """
+    Returns the set of all valid transitions (input difference, output
+    difference, weight bits) of the S-box encoded as integers, where the
+    first variable corresponds to the most significant bit.
+
+    The probability of a transition is 2^-{hw(weight bits)}, the weight is
+    encoded as ones in the least significant bits.
+    """
+    n = len(sbox).bit_length() - 1
+    weights = getSboxWeights(sbox, WEIGHT_ROUNDING["exhaustive"])
+    return {(transition << n) | ((1 << weight) - 1)
+            for transition, weight in weights.items()}
+
+
+def getExhaustiveClauses(sbox):
+    """
+    Returns one clause for each invalid assignment of the input, output and
+    weight variables of the S-box.
+
+    A clause is given as a string over {0, 1, -}, where the i-th character
+    is the value of the i-th variable which is excluded by the clause, or
+    '-' if the variable does not occur in the clause.
+    """
+    num_vars = 3 * (len(sbox).bit_length() - 1)
+    transitions = getSboxTransitions(sbox)
+    pattern = "0{}b".format(num_vars)
+
+    return [format(assignment, pattern) for assignment in range(1 << num_vars)
+            if assignment not in transitions]
+
+
+def getMinimizedClauses(sbox):
+    """
+    Returns a small set of clauses for the S-box which has the same
+    solutions as the exhaustive encoding.
+
+    The constraints are split into the valid transitions over the input and
+    output variables and, for each weight bit w_i (counted from the LSB), the
+    condition that w_i = 1 iff the weight of the transition is larger than i.
+    Each of these functions only depends on 2n variables and is minimized
+    separately by covering the excluded points with maximal cubes.
+    """
+    n = len(sbox).bit_length() - 1
+    weights = getSboxWeights(sbox, WEIGHT_ROUNDING["minimized"])
+
+    valid = 0
+    for transition in weights:
+        valid |= 1 << transition
+    invalid = ((1 << (1 << (2 * n))) - 1) ^ valid
+
+    # Only the input and output variables occur in these clauses
+    clauses = [cube + "-" * n for cube in getCubeCover(invalid, valid, 2 * n)]
+
+    for bit in range(n):
+        # Valid transitions with w_i = 1 and w_i = 0
+        weight_set = 0
+        for transition, weight in weights.items():
+            if weight > bit:
+                weight_set |= 1 << transition
+        weight_unset = valid ^ weight_set
+
+        # Invalid transitions can be ignored here
+        position = n - 1 - bit
+        for cube in getCubeCover(weight_set, weight_unset, 2 * n):
+            clauses.append(cube + "-" * position + "0" + "-" * bit)
+        for cube in getCubeCover(weight_unset, weight_set, 2 * n):
+            clauses.append(cube + "-" * position + "1" + "-" * bit)
+
+    return clauses
+
+
+def getCubeCover(target, forbidden, num_vars):
+    """
+    Returns a list of cubes over num_vars variables which cover all points
+    in target and no point in forbidden. Sets of points are given as
+    bitmaps, where bit i corresponds to the point i.
+
+    Cubes are grown greedily to prime cubes and redundant cubes are removed
+    afterwards. The result is not minimal but close to it in practice.
+    """
+    full = (1 << (1 << num_vars)) - 1
+    masks = getVariableMasks(num_vars)
+    # Points where the i-th variable is 0 and 1
+    literals = [(full ^ mask, mask) for mask in masks]
+
+    cubes = []
+    uncovered = target
+    while uncovered:
+        # Expand the smallest uncovered point
+        point = (uncovered & -uncovered).bit_length() - 1
+        values = [(point >> (num_vars - 1 - var)) & 1
+                  for var in range(num_vars)]
+        fixed = list(range(num_vars))
+        points = 1 << point
+
+        for var in range(num_vars):
+            candidate = [other for other in fixed if other != var]
+            candidate_points = full
+            for other in candidate:
+                candidate_points &= literals[other][values[other]]
+            if candidate_points & forbidden == 0:
+                fixed = candidate
+                points = candidate_points
+
+        cube = ["-"] * num_vars
+        for var in fixed:
+            cube[var] = str(values[var])
+        cubes.append(("".join(cube), points))
+        uncovered &= ~points
+
+    # Remove cubes which are covered by the remaining ones
+    remaining = [0] * (len(cubes) + 1)
+    for idx in range(len(cubes) - 1, -1, -1):
+        remaining[idx] = remaining[idx + 1] | cubes[idx][1]
+
+    cover = []
+    kept = 0
+    for idx, (cube, points) in enumerate(cubes):
+        if points & target & ~(kept | remaining[idx + 1]) == 0:
+            continue
+        cover.append(cube)
+        kept |= points
+    return cover
+
+
+def getVariableMasks(num_vars):
+    """
+    Returns for each variable the bitmap of all points over num_vars
+    variables in which this variable is one. The first variable
+    corresponds to the most significant bit of a point.
+    """
+    num_points = 1 << num_vars
+    masks = []
+    for var in range(num_vars):
+        period = 1 << (num_vars - var)
+        mask = ((1 << (period // 2)) - 1) << (period // 2)
+        while period < num_points:
+            mask |= mask << period
+            period *= 2
+        masks.append(mask)
+    return masks
+
+
+# Available encodings of the S-box constraints
+ENCODINGS = {"exhaustive" : getExhaustiveClauses,
+             "minimized" : getMinimizedClauses}
+
+
+def getDefaultEncoding(sbox):
+    """
+    Returns the encoding used for the S-box in the models. Enumerating all
+    assignments is only feasible up to 4-bit S-boxes.
+    """
+    if sboxtables.getSboxSize(sbox) <= 4:
+        return "exhaustive"
+    return "minimized"
+
+
+def getSboxClauses(sbox, encoding="exhaustive"):
+    """
+    Returns the clauses for the given S-box and encoding. The result is
+    computed once per process and stored on disk in PATH_SBOX_CACHE.
+    """
+    key = (encoding, tuple(sbox))
+    if key in _clauses:
+        return _clauses[key]
+
+    clauses = loadClauses(encoding, sbox)
+    if clauses is None:
+        clauses = ENCODINGS[encoding](sbox)
+        storeClauses(encoding, sbox, clauses)
+
+    _clauses[key] = clauses
+    return clauses
+
+
+def getSboxTemplate(sbox, encoding="exhaustive"):
+    """
+    Returns a format string for the STP assertion of the S-box constraints.
+    The i-th variable of the S-box is referenced as {i}.
+    """
+    key = (encoding, tuple(sbox))
+    if key in _templates:
+        return _templates[key]
+
+    cnf = []
+    for clause in getSboxClauses(sbox, encoding):
+        literals = ["~{{{}}}".format(var) if value == "1" else
+                    "{{{}}}".format(var)
+                    for var, value in enumerate(clause) if value != "-"]
+        cnf.append("(" + " | ".join(literals) + ")")
+
+    template = "ASSERT(({}) = 0bin1);\n".format(" & ".join(cnf))
+    _templates[key] = template
+    return template
+
+
+def getCacheFilename(encoding, sbox):
+    """
+    Returns the path of the file which caches the clauses of the S-box.
+    The name contains the weight rounding, such that clauses written with
+    other weights are never reused.
+    """
+    digest = hashlib.sha1(",".join(map(str, sbox)).encode("utf-8")).hexdigest()
+    return os.path.join(PATH_SBOX_CACHE, "{}_{}_{}.cnf".format(
+        encoding, WEIGHT_ROUNDING[encoding], digest))
+
+
+def loadClauses(encoding, sbox):
+    """
+    Returns the cached clauses for the S-box or None if they are not
+    available on disk.
+    """
+    filename = getCacheFilename(encoding, sbox)
+    if not os.path.isfile(filename):
+        return None
+
+    with open(filename, "r") as cache_file:
+        # First line contains the S-box to detect collisions
+        if cache_file.readline().strip() != ",".join(map(str, sbox)):
+            return None
+        return [line.strip() for line in cache_file if line.strip()]
+
+
+def storeClauses(encoding, sbox, clauses):
+    """
+    Writes the clauses for the S-box to the disk cache. The file is replaced
+    atomically so that concurrent runs never see a partial file.
+    """
+    filename = getCacheFilename(encoding, sbox)
+    tmp_filename = "{}.{}.tmp".format(filename, os.getpid())
+    try:
+        os.makedirs(PATH_SBOX_CACHE, exist_ok=True)
+        with open(tmp_filename, "w") as cache_file:
+            cache_file.write(",".join(map(str, sbox)) + "\n")
+            cache_file.write("\n".join(clauses) + "\n")
+        os.replace(tmp_filename, filename)
+    except OSError:
+        # The cache is optional, the clauses are recomputed next time
+        pass
+    return
@@ -4,9 +4,100 @@ Created on Mar 28, 2014
 Provides functions for constructing the input file for STP.
 @author: stefan
 '''
-import itertools
+from parser import sboxcnf
+from config import PATH_WEIGHT_ENCODINGS
+
+import os
+
+# Available encodings of the hamming weight, see setWeightEncoding
+WEIGHT_ENCODINGS = ["bvplus", "tree", "counter"]
+
+# Encodings which work in every mode and can be selected automatically. The
+# counter can not be used by the incremental search and is rebuilt for
+# each weight, it has to be chosen with --weightencoding.
+DEFAULT_WEIGHT_ENCODINGS = ["bvplus", "tree"]
+
+# Encoding of the hamming weight used for the current run
+weight_encoding = "bvplus"
+
+# Assert weight = sweight or only weight <= sweight, see setExactWeight
+exact_weight = True
+
+# Minimal weights of fewer rounds, see setRoundBounds
+round_bounds = {}
+
+# Number of characters which are buffered before writing to the file
+STP_BUFFER_SIZE = 1 << 22
+
+
+class STPWriter(object):
+    """
+    Collects the commands of an STP model and writes them in large chunks
+    to the file. Behaves like a file opened for writing and can be used as
+    a context manager. If no filename is given the model is only kept in
+    memory and can be retrieved with getvalue(). Instead of a filename an
+    open file object, e.g. an io.StringIO, can be given, which is not
+    closed.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.commands = []
+        self.buffered = 0
+        self.stp_file = None
+        self.close_file = False
+        if hasattr(filename, "write"):
+            self.stp_file = filename
+        elif filename is not None:
+            self.stp_file = open(filename, "w")
+            self.close_file = True
+        return
+
+    def write(self, command):
+        """
+        Adds the command to the model.
+        """
+        self.commands.append(command)
+        self.buffered += len(command)
+        if self.stp_file is not None and self.buffered > STP_BUFFER_SIZE:
+            self.flush()
+        return
+
+    def flush(self):
+        """
+        Writes all buffered commands to the file.
+        """
+        if self.stp_file is not None:
+            self.stp_file.write("".join(self.commands))
+            self.commands = []
+            self.buffered = 0
+        return
+
+    def getvalue(self):
+        """
+        Returns the model if it is kept in memory.
+        """
+        assert(self.stp_file is None)
+        return "".join(self.commands)
+
+    def close(self):
+        """
+        Writes the remaining commands and closes the file.
+        """
+        if self.stp_file is not None:
+            self.flush()
+            if self.close_file:
+                self.stp_file.close()
+            self.stp_file = None
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
 
-import itertools
 
 def blockCharacteristic(stpfile, characteristic, wordsize):
     """
@@ -18,13 +109,10 @@ def blockCharacteristic(stpfile, characteristic, wordsize):
                       characteristic.characteristic_data.items()
                       if not var_name.startswith('w')}
 
-    blockingStatement = "ASSERT(NOT("
-
-    for key, value in filtered_words.items():
-        blockingStatement += "BVXOR({}, {}) | ".format(key, value)
-
-    blockingStatement = blockingStatement[:-2]
-    blockingStatement += ") = 0hex{});".format("0"*(wordsize // 4))
+    blockingStatement = "ASSERT(NOT({}) = 0hex{});".format(
+        " | ".join("BVXOR({}, {})".format(key, value)
+                   for key, value in filtered_words.items()),
+        "0"*(wordsize // 4))
     stpfile.write(blockingStatement)
     return
 
@@ -60,11 +148,7 @@ def getStringForVariables(variables, wordsize):
     and constructs for instance a string of the form:
     x00, x01, ..., x30: BITVECTOR(wordsize);
     """
-    command = ""
-    for var in variables:
-        command += var + ","
-
-    command = command[:-1]
+    command = ",".join(variables)
     command += ": BITVECTOR({0});".format(wordsize)
     return command
 
@@ -78,19 +162,109 @@ def getStringForNonZero(variables, wordsize):
     """
     Asserts that no all-zero characteristic is allowed
     """
-    command = "ASSERT(NOT(("
-    for var in variables:
-        command += var + "|"
-
-    command = command[:-1]
-    command += ") = 0bin{}));".format("0" * wordsize)
+    command = "ASSERT(NOT(({}) = 0bin{}));".format("|".join(variables),
+                                                    "0" * wordsize)
     return command
 
 
+def setWeightEncoding(encoding):
+    """
+    Selects how the hamming weight is encoded by setupWeightComputation
+    and limitWeight.
+
+    bvplus  ... sum of the weight of each word with BVPLUS
+    tree    ... balanced adder tree over all bits
+    counter ... sequential counter which directly asserts the bound
+    """
+    global weight_encoding
+    assert(encoding in WEIGHT_ENCODINGS)
+    weight_encoding = encoding
+    return
+
+
+def loadWeightEncodings():
+    """
+    Returns the fastest weight encoding of each cipher measured by
+    benchmark.py, which is stored in PATH_WEIGHT_ENCODINGS.
+    """
+    encodings = {}
+    if not os.path.isfile(PATH_WEIGHT_ENCODINGS):
+        return encodings
+
+    with open(PATH_WEIGHT_ENCODINGS, "r") as encodings_file:
+        for line in encodings_file:
+            fields = line.split()
+            if len(fields) == 2 and fields[1] in WEIGHT_ENCODINGS:
+                encodings[fields[0]] = fields[1]
+    return encodings
+
+
+def getDefaultWeightEncoding(cipher_name):
+    """
+    Returns the fastest weight encoding measured for the cipher, or bvplus
+    if the cipher was not benchmarked or the stored encoding can not be
+    used in every mode.
+    """
+    encoding = loadWeightEncodings().get(cipher_name, "bvplus")
+    if encoding not in DEFAULT_WEIGHT_ENCODINGS:
+        print("WARNING: The {} encoding stored for {} is only used with "
+              "\"--weightencoding\", using bvplus".format(encoding,
+                                                         cipher_name))
+        return "bvplus"
+    return encoding
+
+
+def storeWeightEncodings(encodings):
+    """
+    Adds the fastest weight encoding of each cipher to
+    PATH_WEIGHT_ENCODINGS. The file is replaced atomically so that
+    concurrent runs never see a partial file.
+    """
+    stored = loadWeightEncodings()
+    stored.update(encodings)
+    tmp_filename = "{}.{}.tmp".format(PATH_WEIGHT_ENCODINGS, os.getpid())
+    directory = os.path.dirname(PATH_WEIGHT_ENCODINGS)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(tmp_filename, "w") as encodings_file:
+        for cipher_name, encoding in sorted(stored.items()):
+            encodings_file.write("{} {}\n".format(cipher_name, encoding))
+    os.replace(tmp_filename, PATH_WEIGHT_ENCODINGS)
+    return
+
+
+def setExactWeight(exact):
+    """
+    Selects whether setupWeightComputation asserts that the weight is equal
+    to the given weight or only bounds it from above.
+    """
+    global exact_weight
+    exact_weight = exact
+    return
+
+
+def setRoundBounds(rounds, bounds):
+    """
+    Sets the minimal weights bounds[i] of characteristics over i rounds.
+    For a model with the given number of rounds, setupWeightComputation
+    asserts that the first and the last i rounds have at least this weight.
+    The bounds are only used if the weight has one word per round.
+    """
+    global round_bounds
+    round_bounds = {}
+    if bounds:
+        round_bounds = {"rounds" : rounds, "bounds" : dict(bounds)}
+    return
+
+
 def limitWeight(stpfile, weight, p, wordsize, ignoreMSBs=0):
     """
     Adds the weight computation and assertion to the stp stpfile.
     """
+    if weight_encoding == "counter":
+        stpfile.write(getWeightCounterString(p, wordsize, weight, ignoreMSBs,
+                                             "limitWeight", False))
+        return
     stpfile.write("limitWeight: BITVECTOR(16);\n")
     stpfile.write(getWeightString(p, wordsize, ignoreMSBs, "limitWeight") + "\n")
     stpfile.write("ASSERT(BVLE(limitWeight, {0:#018b}));\n".format(weight))
@@ -101,15 +275,13 @@ def setupWeightComputationSum(stpfile, weight, p, wordsize, ignoreMSBs=0):
     Assert that weight is equal to the sum of p.
     """
     stpfile.write("weight: BITVECTOR(16);\n")
-    round_sum = ""
-    for w in p:
-        round_sum += w + ","
+    round_sum = ",".join(p)
     if len(p) > 1:
-        stpfile.write("ASSERT(weight = BVPLUS({},{}));\n".format(16, round_sum[:-1]))
+        stpfile.write("ASSERT(weight = BVPLUS({},{}));\n".format(16, round_sum))
     else:
-        stpfile.write("ASSERT(weight = {});\n".format(round_sum[:-1]))
+        stpfile.write("ASSERT(weight = {});\n".format(round_sum))
 
-    stpfile.write("ASSERT(weight = {0:#018b});\n".format(weight))
+    stpfile.write(getWeightAssertion(weight))
     return
 
 def setupWeightComputation(stpfile, weight, p, wordsize, ignoreMSBs=0):
@@ -117,12 +289,102 @@ def setupWeightComputation(stpfile, weight, p, wordsize, ignoreMSBs=0):
     Assert that weight is equal to the sum of the hamming weight of p.
     """
     stpfile.write("weight: BITVECTOR(16);\n")
-    stpfile.write(getWeightString(p, wordsize, ignoreMSBs) + "\n")
-    stpfile.write("ASSERT(weight = {0:#018b});\n".format(weight))
-    #stpfile.write("ASSERT(BVLE(weight, {0:#018b}));\n".format(weight))
+    if weight_encoding == "counter":
+        stpfile.write(getWeightCounterString(p, wordsize, weight, ignoreMSBs,
+                                             "weight", exact_weight))
+        stpfile.write(getRoundBoundsString(p, wordsize, weight, ignoreMSBs))
+        if not exact_weight:
+            # The last counter has one bit set for each unit of weight
+            num_bits = len(p) * (wordsize - ignoreMSBs)
+            counter = ["weight_cnt{}".format(num_bits - 1)] if num_bits else []
+            stpfile.write(getWeightTreeString(counter, weight + 1) + "\n")
+            return
+    else:
+        stpfile.write(getRoundBoundsString(p, wordsize, weight, ignoreMSBs))
+        stpfile.write(getWeightString(p, wordsize, ignoreMSBs) + "\n")
+
+    stpfile.write(getWeightAssertion(weight))
     return
 
 
+def getWeightAssertion(weight):
+    """
+    Returns the assertion weight = weight, or weight <= weight if the
+    weight is not exact.
+    """
+    if exact_weight:
+        return "ASSERT(weight = {0:#018b});\n".format(weight)
+    return "ASSERT(BVLE(weight, {0:#018b}));\n".format(weight)
+
+
+def getRoundBoundsString(p, wordsize, weight, ignoreMSBs=0):
+    """
+    Asserts the bounds set with setRoundBounds for the weight of the first
+    and last rounds, if p contains one word per round. The last j rounds
+    have at least weight B_j iff the first r - j rounds have at most the
+    weight - B_j, so only the weights of the first rounds are needed.
+    """
+    if not round_bounds or len(p) != round_bounds["rounds"]:
+        return ""
+
+    # Lower and upper bounds on the weight of the first i rounds
+    lower = {}
+    upper = {}
+    for rounds, bound in round_bounds["bounds"].items():
+        if 0 < rounds < len(p) and bound > 0:
+            lower[rounds] = bound
+            upper[len(p) - rounds] = bound
+    if not lower:
+        return ""
+
+    if weight_encoding == "counter":
+        return getRoundBoundsCounterString(lower, upper, wordsize - ignoreMSBs,
+                                           weight)
+
+    command = []
+    round_weights = ["weight_round{}".format(i) for i in range(len(p))]
+    command.append(getStringForVariables(round_weights, 16) + "\n")
+    for word, round_weight in zip(p, round_weights):
+        command.append(getWeightString([word], wordsize, ignoreMSBs,
+                                       round_weight) + "\n")
+
+    partial_sum = round_weights[0]
+    for rounds in range(1, max(list(lower) + list(upper)) + 1):
+        if rounds > 1:
+            name = "weight_first{}".format(rounds)
+            command.append("{}: BITVECTOR(16);\n".format(name))
+            command.append("ASSERT({} = BVPLUS(16, {}, {}));\n".format(
+                name, partial_sum, round_weights[rounds - 1]))
+            partial_sum = name
+        if rounds in lower:
+            command.append("ASSERT(BVGE({}, {:#018b}));\n".format(
+                partial_sum, lower[rounds]))
+        if rounds in upper:
+            command.append("ASSERT(BVLE(BVPLUS(16, {}, {:#018b}), "
+                           "weight));\n".format(partial_sum, upper[rounds]))
+    return "".join(command)
+
+
+def getRoundBoundsCounterString(lower, upper, bits_per_round, weight,
+                                weightVariable="weight"):
+    """
+    Asserts the bounds on the weight of the first rounds on the bits of the
+    sequential counter of getWeightCounterString.
+    """
+    command = []
+    for rounds, bound in sorted(lower.items()):
+        if bound > weight:
+            return "ASSERT(FALSE);\n"
+        command.append("ASSERT({0}_cnt{1}[{2}:{2}] = 0bin1);\n".format(
+            weightVariable, rounds * bits_per_round - 1, bound - 1))
+    for rounds, bound in sorted(upper.items()):
+        if bound > weight:
+            return "ASSERT(FALSE);\n"
+        command.append("ASSERT({0}_cnt{1}[{2}:{2}] = 0bin0);\n".format(
+            weightVariable, rounds * bits_per_round - 1, weight - bound))
+    return "".join(command)
+
+
 def getWeightString(variables, wordsize, ignoreMSBs=0, weightVariable="weight"):
     """
     Asserts that the weight is equal to the hamming weight of the
@@ -131,22 +393,104 @@ def getWeightString(variables, wordsize, ignoreMSBs=0, weightVariable="weight"):
     # if len(variables) == 1:
     #     return "ASSERT({} = {});\n".format(weightVariable, variables[0])
 
-    command = "ASSERT(({} = BVPLUS(16,".format(weightVariable)
+    if weight_encoding == "tree":
+        return getWeightTreeString(variables, wordsize, ignoreMSBs,
+                                   weightVariable)
+
+    summands = []
     for var in variables:
-        tmp = "0b00000000@(BVPLUS(8, "
-        for bit in range(wordsize - ignoreMSBs):
-            # Ignore MSBs if they do not contribute to
-            # probability of the characteristic.
-            tmp += "0bin0000000@({0}[{1}:{1}]),".format(var, bit)
-        command += tmp[:-1] + ")),"
+        # Ignore MSBs if they do not contribute to
+        # probability of the characteristic.
+        bits = ["0bin0000000@({0}[{1}:{1}])".format(var, bit)
+                for bit in range(wordsize - ignoreMSBs)]
+        summands.append("0b00000000@(BVPLUS(8, " + ",".join(bits) + "))")
     if len(variables):
-        command += "0bin0000000000000000,"
-    command = command[:-1]
-    command += ")));"
+        summands.append("0bin0000000000000000")
+    command = "ASSERT(({} = BVPLUS(16,{})));".format(weightVariable,
+                                                     ",".join(summands))
 
     return command
 
 
+def getWeightTreeString(variables, wordsize, ignoreMSBs=0,
+                        weightVariable="weight"):
+    """
+    Asserts that the weight is equal to the hamming weight of the given
+    variables, computed by a balanced tree of adders. Each adder is only
+    as wide as its result needs to be.
+    """
+    # (expression, width) of all partial sums
+    sums = [("{0}[{1}:{1}]".format(var, bit), 1) for var in variables
+            for bit in range(wordsize - ignoreMSBs)]
+    if not sums:
+        return "ASSERT({} = 0bin{});".format(weightVariable, "0" * 16)
+
+    while len(sums) > 1:
+        next_sums = []
+        for left, right in zip(sums[0::2], sums[1::2]):
+            width = max(left[1], right[1]) + 1
+            next_sums.append(("BVPLUS({}, {}, {})".format(
+                width, getStringZeroExtend(left[0], left[1], width),
+                getStringZeroExtend(right[0], right[1], width)), width))
+        if len(sums) % 2 == 1:
+            next_sums.append(sums[-1])
+        sums = next_sums
+
+    assert(sums[0][1] <= 16)
+    return "ASSERT({} = {});".format(
+        weightVariable, getStringZeroExtend(sums[0][0], sums[0][1], 16))
+
+
+def getWeightCounterString(variables, wordsize, weight, ignoreMSBs=0,
+                           weightVariable="weight", exact=True):
+    """
+    Asserts that the hamming weight of the given variables is equal to
+    (or at most) weight using a sequential counter.
+
+    The counter c_i has weight + 1 bits and c_i[j] = 1 iff at least j + 1
+    of the first i bits are set. The last bit saturates.
+    """
+    bits = ["{0}[{1}:{1}]".format(var, bit) for var in variables
+            for bit in range(wordsize - ignoreMSBs)]
+    if not bits:
+        return "ASSERT(FALSE);\n" if exact and weight > 0 else ""
+
+    width = weight + 1
+    counters = ["{}_cnt{}".format(weightVariable, i) for i in range(len(bits))]
+    zero = "0bin" + "0" * width
+    one = "0bin" + "0" * (width - 1) + "1"
+
+    command = [getStringForVariables(counters, width) + "\n"]
+    command.append("ASSERT({} = (IF {} = 0bin1 THEN {} ELSE {} ENDIF));\n".format(
+        counters[0], bits[0], one, zero))
+
+    for i in range(1, len(bits)):
+        previous = counters[i - 1]
+        increment = "(({} << 1)[{}:0] | {})".format(previous, width - 1, one)
+        command.append("ASSERT({0} = ({1} | (IF {2} = 0bin1 THEN {3} "
+                       "ELSE {4} ENDIF)));\n".format(counters[i], previous,
+                                                     bits[i], increment, zero))
+
+    previous = counters[-1]
+
+    # At most weight bits are set
+    command.append("ASSERT({0}[{1}:{1}] = 0bin0);\n".format(previous,
+                                                            width - 1))
+    if exact and weight > 0:
+        command.append("ASSERT({0}[{1}:{1}] = 0bin1);\n".format(previous,
+                                                                width - 2))
+    return "".join(command)
+
+
+def getStringZeroExtend(value, width, new_width):
+    """
+    Returns value zero extended from width to new_width bits.
+    """
+    if width == new_width:
+        return value
+    return "0bin{}@({})".format("0" * (new_width - width), value)
+
+
 def getStringEq(a, b, c):
     command = "(BVXOR(~{0}, {1}) & BVXOR(~{0}, {2}))".format(a, b, c)
     return command
@@ -217,52 +561,7 @@ def add4bitSbox(sbox, variables):
     assert(len(sbox) == 16)
     assert(len(variables) == 12)
 
-    # First compute the DDT
-    DDT = [[0]*16 for i in range(16)]
-
-    for a in range(16):
-        for b in range(16):
-            DDT[a ^ b][sbox[a] ^ sbox[b]] += 1
-
-    # Construct DNF of all valid trails
-    trails = []
-
-    # All zero trail with probability 1
-    for input_diff in range(16):
-        for output_diff in range(16):
-            if DDT[input_diff][output_diff] != 0:
-                tmp = []
-                tmp.append((input_diff >> 3) & 1)
-                tmp.append((input_diff >> 2) & 1)
-                tmp.append((input_diff >> 1) & 1)
-                tmp.append((input_diff >> 0) & 1)
-                tmp.append((output_diff >> 3) & 1)
-                tmp.append((output_diff >> 2) & 1)
-                tmp.append((output_diff >> 1) & 1)
-                tmp.append((output_diff >> 0) & 1)
-                if DDT[input_diff][output_diff] == 2:
-                    tmp += [0, 1, 1, 1] # 2^-3
-                elif DDT[input_diff][output_diff] == 4:
-                    tmp += [0, 0, 1, 1] # 2^-2
-                elif DDT[input_diff][output_diff] == 8:
-                    tmp += [0, 0, 0, 1] # 2^-1
-                elif DDT[input_diff][output_diff] == 16:
-                    tmp += [0, 0, 0, 0]
-                trails.append(tmp)
-
-    # Build CNF from invalid trails
-    cnf = ""
-    for prod in itertools.product([0, 1], repeat=len(trails[0])):
-        # Trail is not valid
-        if list(prod) not in trails:
-            expr = ["~" if x == 1 else "" for x in list(prod)]
-            clause = ""
-            for literal in range(12):
-                clause += "{0}{1} | ".format(expr[literal], variables[literal])
-
-            cnf += "({}) &".format(clause[:-2])
-
-    return "ASSERT({} = 0bin1);\n".format(cnf[:-2])
+    return sboxcnf.getSboxTemplate(sbox).format(*variables)
 
 def add4bitSboxNibbles(sbox, input_word, output_word, weight):
     """
@@ -302,65 +601,5 @@ def add8bitSbox(sbox, variables):
     assert(len(sbox) == 256)
     assert(len(variables) == 24)
 
-    # First compute the DDT
-    DDT = [[0]*256 for i in range(256)]
-
-    for a in range(256):
-        for b in range(256):
-            DDT[a ^ b][sbox[a] ^ sbox[b]] += 1
-
-    # Construct DNF of all valid trails
-    trails = []
-
-    # All zero trail with probability 1
-    for input_diff in range(256):
-        for output_diff in range(256):
-            if DDT[input_diff][output_diff] != 0:
-                tmp = []
-                tmp.append((input_diff >> 7) & 1)
-                tmp.append((input_diff >> 6) & 1)
-                tmp.append((input_diff >> 5) & 1)
-                tmp.append((input_diff >> 4) & 1)
-                tmp.append((input_diff >> 3) & 1)
-                tmp.append((input_diff >> 2) & 1)
-                tmp.append((input_diff >> 1) & 1)
-                tmp.append((input_diff >> 0) & 1)
-                tmp.append((output_diff >> 7) & 1)
-                tmp.append((output_diff >> 6) & 1)
-                tmp.append((output_diff >> 5) & 1)
-                tmp.append((output_diff >> 4) & 1)
-                tmp.append((output_diff >> 3) & 1)
-                tmp.append((output_diff >> 2) & 1)
-                tmp.append((output_diff >> 1) & 1)
-                tmp.append((output_diff >> 0) & 1)
-                if DDT[input_diff][output_diff] == 2:
-                    tmp += [0, 1, 1, 1, 1, 1, 1, 1] # 2^-7
-                elif DDT[input_diff][output_diff] == 4:
-                    tmp += [0, 0, 1, 1, 1, 1, 1, 1] # 2^-6
-                elif DDT[input_diff][output_diff] == 8:
-                    tmp += [0, 0, 0, 1, 1, 1, 1, 1] # 2^-5
-                elif DDT[input_diff][output_diff] == 16:
-                    tmp += [0, 0, 0, 0, 1, 1, 1, 1] # 2^-4
-                elif DDT[input_diff][output_diff] == 32:
-                    tmp += [0, 0, 0, 0, 0, 1, 1, 1] # 2^-3
-                elif DDT[input_diff][output_diff] == 64:
-                    tmp += [0, 0, 0, 0, 0, 0, 1, 1] # 2^-2
-                elif DDT[input_diff][output_diff] == 128:
-                    tmp += [0, 0, 0, 0, 0, 0, 0, 1] # 2^-1
-                elif DDT[input_diff][output_diff] == 256:
-                    tmp += [0, 0, 0, 0, 0, 0, 0, 0] # 2^-0
-                trails.append(tmp)
-
-    # Build CNF from invalid trails
-    cnf = ""
-    for prod in itertools.product([0, 1], repeat=len(trails[0])):
-        # Trail is not valid
-        if list(prod) not in trails:
-            expr = ["~" if x == 1 else "" for x in list(prod)]
-            clause = ""
-            for literal in range(24):
-                clause += "{0}{1} | ".format(expr[literal], variables[literal])
-
-            cnf += "({}) &".format(clause[:-2])
-
-    return "ASSERT({} = 0bin1);\n".format(cnf[:-2])
+    # Enumerating all 2^24 assignments is not feasible
+    return sboxcnf.getSboxTemplate(sbox, "minimized").format(*variables)
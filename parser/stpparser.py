@@ -0,0 +1,274 @@
+'''
+Created on Oct 18, 2026
+
+Parser for the subset of the CVC language used by the cipher models, which
+is shared by the translations of the STP models into CNF and SMT-LIB2.
+@author: stefan
+'''
+
+import re
+
+# Bits of the constants, which are also the literals TRUE and FALSE of the
+# CNF translation
+TRUE = 1
+FALSE = -1
+
+# Number of characters read at once from an STP file
+READ_SIZE = 1 << 22
+
+TOKEN_REGEX = re.compile(r"0bin[01]+|0hex[0-9a-fA-F]+|0x[0-9a-fA-F]+|0b[01]+|"
+                         r"\d+|[A-Za-z_]\w*|<<|>>|\S")
+DECLARATION_REGEX = re.compile(r"([\w\s,]+):\s*BITVECTOR\s*\(\s*(\d+)\s*\)$")
+COMMENT_REGEX = re.compile(r"%[^\n]*")
+
+# Functions with a fixed result width as first argument
+SIZED_FUNCTIONS = ["BVPLUS", "BVSUB", "BVMOD"]
+
+# Functions on bitvectors with two arguments
+BINARY_FUNCTIONS = ["BVXOR", "BVLE", "BVLT", "BVGE", "BVGT"]
+
+
+class STPParser(object):
+    """
+    Splits an STP model into its commands and parses the assertions into
+    expression trees of tuples (kind, operands...). Subclasses translate
+    the declarations and assertions with addVariable and addAssertion.
+    """
+
+    def __init__(self):
+        # Declared variables, which are looked up by parsePrimary
+        self.variables = {}
+        self.tokens = []
+        self.position = 0
+        return
+
+    def parseFile(self, filename):
+        """
+        Adds all commands of the STP file to the model.
+        """
+        with open(filename, "r") as stp_file:
+            remainder = ""
+            while True:
+                chunk = stp_file.read(READ_SIZE)
+                if not chunk:
+                    break
+                statements = (remainder + chunk).split(";")
+                remainder = statements.pop()
+                for statement in statements:
+                    self.addStatement(statement)
+            self.addStatement(remainder)
+        return
+
+    def parseString(self, model):
+        """
+        Adds all commands of the STP model to the model.
+        """
+        for statement in model.split(";"):
+            self.addStatement(statement)
+        return
+
+    def addStatement(self, statement):
+        """
+        Adds a single command, without the terminating semicolon.
+        """
+        if "%" in statement:
+            statement = COMMENT_REGEX.sub("", statement)
+        statement = statement.strip()
+
+        if not statement or statement.startswith("QUERY") or \
+           statement == "COUNTEREXAMPLE":
+            return
+        if statement.startswith("ASSERT"):
+            self.addAssertion(statement)
+            return
+
+        declaration = DECLARATION_REGEX.match(statement)
+        if declaration is None:
+            print("ERROR: Command not supported in the STP models: {}".format(
+                statement[:80]))
+            exit(1)
+        width = int(declaration.group(2))
+        for name in declaration.group(1).split(","):
+            self.addVariable(name.strip(), width)
+        return
+
+    def addVariable(self, name, width):
+        """
+        Adds a variable declared with the given width.
+        """
+        raise NotImplementedError()
+
+    def addAssertion(self, statement):
+        """
+        Adds a command ASSERT(...).
+        """
+        raise NotImplementedError()
+
+    def parseAssertion(self, statement):
+        """
+        Returns the expression tree of the formula of a command ASSERT(...).
+        """
+        self.tokens = TOKEN_REGEX.findall(statement)
+        self.position = 1
+        return self.parseFormula()
+
+    def getToken(self):
+        """
+        Returns the next token without consuming it.
+        """
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def expect(self, token):
+        """
+        Consumes the next token which has to be the given one.
+        """
+        if self.getToken() != token:
+            print("ERROR: Expected '{}' but found '{}' in: {}".format(
+                token, self.getToken(), " ".join(self.tokens)[:80]))
+            exit(1)
+        self.position += 1
+        return
+
+    def parseFormula(self):
+        """
+        Formula := NOT Formula | Term [= Term]
+        """
+        if self.getToken() == "NOT":
+            self.position += 1
+            return ("lnot", self.parseFormula())
+        left = self.parseConcat()
+        if self.getToken() == "=":
+            self.position += 1
+            return ("eq", left, self.parseConcat())
+        return left
+
+    def parseConcat(self):
+        """
+        Term := Term @ Term, which has the lowest precedence.
+        """
+        node = self.parseBinary("|")
+        while self.getToken() == "@":
+            self.position += 1
+            node = ("concat", node, self.parseBinary("|"))
+        return node
+
+    def parseBinary(self, operator):
+        """
+        Parses the left associative operators | and &.
+        """
+        parseOperand = self.parseUnary
+        if operator == "|":
+            parseOperand = lambda: self.parseBinary("&")
+        node = parseOperand()
+        while self.getToken() == operator:
+            self.position += 1
+            node = ("or" if operator == "|" else "and", node, parseOperand())
+        return node
+
+    def parseUnary(self):
+        """
+        Negation binds weaker than the shifts, ~a << 1 = ~(a << 1).
+        """
+        if self.getToken() == "~":
+            self.position += 1
+            return ("not", self.parseUnary())
+        node = self.parsePostfix()
+        while self.getToken() in ["<<", ">>"]:
+            kind = "shl" if self.getToken() == "<<" else "shr"
+            self.position += 2
+            node = (kind, node, int(self.tokens[self.position - 1]))
+        return node
+
+    def parsePostfix(self):
+        """
+        Parses a primary expression followed by bit extractions [i:j].
+        """
+        node = self.parsePrimary()
+        while self.getToken() == "[":
+            high = int(self.tokens[self.position + 1])
+            low = int(self.tokens[self.position + 3])
+            self.position += 5
+            node = ("extract", node, high, low)
+        return node
+
+    def parsePrimary(self):
+        """
+        Parses constants, variables, function calls, IF THEN ELSE and
+        parenthesised formulas.
+        """
+        token = self.getToken()
+        self.position += 1
+
+        if token == "(":
+            node = self.parseFormula()
+            self.expect(")")
+            return node
+        if token == "TRUE" or token == "FALSE":
+            return ("const", [TRUE if token == "TRUE" else FALSE])
+        if token == "IF":
+            condition = self.parseFormula()
+            self.expect("THEN")
+            then_node = self.parseFormula()
+            self.expect("ELSE")
+            else_node = self.parseFormula()
+            self.expect("ENDIF")
+            return ("ite", condition, then_node, else_node)
+        if token in SIZED_FUNCTIONS or token in BINARY_FUNCTIONS:
+            self.expect("(")
+            arguments = [self.parseFormula()]
+            while self.getToken() == ",":
+                self.position += 1
+                arguments.append(self.parseFormula())
+            self.expect(")")
+            return (token, arguments)
+        if token.isdigit():
+            return ("numeral", int(token))
+        if token[0].isdigit():
+            return ("const", getConstantBits(token))
+        if token in self.variables:
+            return ("var", token)
+
+        print("ERROR: '{}' is not supported in the STP models".format(token))
+        exit(1)
+
+    def getLeaves(self, node, kind):
+        """
+        Returns the operands of nested operations of the given kind.
+        """
+        leaves = []
+        # The operators are left associative, the tree can be very deep
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node[0] == kind:
+                stack += [node[2], node[1]]
+            else:
+                leaves.append(node)
+        return leaves
+
+
+def getConstantBits(token):
+    """
+    Returns the bits of a constant like 0bin0101, 0hexA or 0xA, LSB first.
+    """
+    if token.startswith("0bin"):
+        digits = token[4:]
+    elif token.startswith("0hex"):
+        digits = "".join(format(int(c, 16), "04b") for c in token[4:])
+    elif token.startswith("0x"):
+        digits = "".join(format(int(c, 16), "04b") for c in token[2:])
+    else:
+        digits = token[2:]
+    return [TRUE if digit == "1" else FALSE for digit in reversed(digits)]
+
+
+def getNumeral(node):
+    """
+    Returns the value of a numeral, like the width of BVPLUS.
+    """
+    if node[0] != "numeral":
+        print("ERROR: Expected a numeral in the STP model")
+        exit(1)
+    return node[1]
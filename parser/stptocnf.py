@@ -0,0 +1,587 @@
+'''
+Created on Oct 18, 2026
+
+Translates the STP models into CNF, such that they can be solved directly
+with a SAT solver. Every bit of a variable is a boolean variable and
+equalities between bits, like the permutation layers, are resolved by merging
+the variables instead of adding clauses. Only the subset of the CVC language
+used by the cipher models is supported.
+@author: stefan
+'''
+
+from parser.stpparser import STPParser, TRUE, FALSE, getNumeral
+
+import re
+
+REFERENCE_REGEX = re.compile(r"(~?)([A-Za-z_]\w*)(?:\[(\d+):(\d+)\])?$")
+
+
+class CNFModel(STPParser):
+    """
+    Bit-blasts an STP model into a set of clauses.
+
+    Literals are integers like in DIMACS, where variable 1 is the constant
+    TRUE. Merged variables are kept in a union-find structure and only
+    replaced by their representative when the CNF is written.
+
+    Assertions var = constant for the variables in assumed are not added to
+    the clauses, such that the value can be passed as assumption to an
+    incremental solver.
+    """
+
+    def __init__(self, assumed=[]):
+        STPParser.__init__(self)
+        self.num_vars = 1
+        self.parent = [0, 0]
+        self.clauses = [[TRUE]]
+        self.unsatisfiable = False
+        # self.variables holds the literals of the bits of each declared
+        # variable, LSB first
+        # Literals of references like "S0[3:3]" used by the S-box clauses
+        self.references = {}
+        # DIMACS index of each representative variable
+        self.dimacs_vars = {}
+        self.assumed = list(assumed)
+        # Values of the assumed variables asserted in the model
+        self.assumed_values = {}
+        return
+
+    def newVariable(self):
+        """
+        Returns a new boolean variable.
+        """
+        self.num_vars += 1
+        self.parent.append(0)
+        return self.num_vars
+
+    def find(self, literal):
+        """
+        Returns the literal of the representative which is equivalent to the
+        given literal.
+        """
+        current = abs(literal)
+        path = []
+        while self.parent[abs(current)]:
+            path.append((abs(current), current))
+            parent = self.parent[abs(current)]
+            current = parent if current > 0 else -parent
+
+        # Point all variables on the path directly to the representative
+        for var, equivalent in path:
+            self.parent[var] = current if equivalent > 0 else -current
+        return current if literal > 0 else -current
+
+    def merge(self, a, b):
+        """
+        Adds the constraint a = b by merging both literals.
+        """
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return
+        if a == -b:
+            self.unsatisfiable = True
+            return
+        # The smaller variable stays the representative, so TRUE is never
+        # replaced
+        if abs(a) < abs(b):
+            a, b = b, a
+        self.parent[abs(a)] = b if a > 0 else -b
+        return
+
+    def addClause(self, literals):
+        """
+        Adds a clause to the model.
+        """
+        if not literals:
+            self.unsatisfiable = True
+        self.clauses.append(literals)
+        return
+
+    def getAnd(self, a, b):
+        """
+        Returns a literal which is equal to a & b.
+        """
+        a = self.find(a)
+        b = self.find(b)
+        if a == FALSE or b == FALSE or a == -b:
+            return FALSE
+        if a == TRUE or a == b:
+            return b
+        if b == TRUE:
+            return a
+        out = self.newVariable()
+        self.clauses += [[-out, a], [-out, b], [out, -a, -b]]
+        return out
+
+    def getOr(self, a, b):
+        """
+        Returns a literal which is equal to a | b.
+        """
+        return -self.getAnd(-a, -b)
+
+    def getXor(self, a, b):
+        """
+        Returns a literal which is equal to a ^ b.
+        """
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return FALSE
+        if a == -b:
+            return TRUE
+        if abs(a) == TRUE:
+            return b if a == FALSE else -b
+        if abs(b) == TRUE:
+            return a if b == FALSE else -a
+        out = self.newVariable()
+        self.clauses += [[-out, a, b], [-out, -a, -b],
+                         [out, -a, b], [out, a, -b]]
+        return out
+
+    def getIte(self, c, a, b):
+        """
+        Returns a literal which is equal to a if c is true and b otherwise.
+        """
+        c = self.find(c)
+        a = self.find(a)
+        b = self.find(b)
+        if c == TRUE or a == b:
+            return a
+        if c == FALSE:
+            return b
+        if a == -b:
+            return self.getXor(c, b)
+        out = self.newVariable()
+        self.clauses += [[-c, -a, out], [-c, a, -out], [c, -b, out],
+                         [c, b, -out], [-a, -b, out], [a, b, -out]]
+        return out
+
+    def getMajority(self, a, b, c):
+        """
+        Returns a literal which is true iff at least two inputs are true.
+        """
+        a = self.find(a)
+        b = self.find(b)
+        c = self.find(c)
+        for x, y, z in [(a, b, c), (b, c, a), (c, a, b)]:
+            if z == TRUE:
+                return self.getOr(x, y)
+            if z == FALSE:
+                return self.getAnd(x, y)
+            if x == y:
+                return x
+            if x == -y:
+                return z
+        out = self.newVariable()
+        self.clauses += [[-a, -b, out], [-a, -c, out], [-b, -c, out],
+                         [a, b, -out], [a, c, -out], [b, c, -out]]
+        return out
+
+    def getOrMany(self, literals):
+        """
+        Returns a literal which is equal to the disjunction of all literals.
+        """
+        remaining = set()
+        for literal in literals:
+            literal = self.find(literal)
+            if literal == TRUE or -literal in remaining:
+                return TRUE
+            if literal != FALSE:
+                remaining.add(literal)
+        if not remaining:
+            return FALSE
+        if len(remaining) == 1:
+            return remaining.pop()
+        out = self.newVariable()
+        self.clauses.append([-out] + list(remaining))
+        self.clauses += [[out, -literal] for literal in remaining]
+        return out
+
+    def getSum(self, a, b, carry=FALSE):
+        """
+        Returns the bits of a + b + carry modulo 2^len(a).
+        """
+        result = []
+        for x, y in zip(a, b):
+            result.append(self.getXor(self.getXor(x, y), carry))
+            carry = self.getMajority(x, y, carry)
+        return result
+
+    def getLessThan(self, a, b, orEqual):
+        """
+        Returns a literal which is true iff a < b (or a <= b) as unsigned
+        integers.
+        """
+        result = TRUE if orEqual else FALSE
+        for x, y in zip(a, b):
+            # The most significant differing bit decides
+            result = self.getIte(self.getXor(x, y), y, result)
+        return result
+
+    def addVariable(self, name, width):
+        """
+        Adds a new boolean variable for each bit of the variable.
+        """
+        self.variables[name] = [self.newVariable() for _ in range(width)]
+        return
+
+    def addAssertion(self, statement):
+        """
+        Adds the constraint of a command ASSERT(...).
+        """
+        if not self.addClauses(statement):
+            self.assertFormula(self.parseAssertion(statement))
+        return
+
+    def addClauses(self, statement):
+        """
+        Adds an assertion of the form ASSERT(((a | ~b) & (...)) = 0bin1),
+        as constructed for the S-boxes, without parsing it. Returns False if
+        the assertion does not have this form.
+        """
+        if not statement.startswith("ASSERT(((") or \
+           not statement.endswith(")) = 0bin1)"):
+            return False
+
+        clauses = []
+        try:
+            for clause in statement[9:-11].split(") & ("):
+                clauses.append([self.references[literal]
+                                for literal in clause.split(" | ")])
+        except KeyError:
+            # Resolve the new references and try again
+            for clause in statement[9:-11].split(") & ("):
+                for literal in clause.split(" | "):
+                    if not self.addReference(literal):
+                        return False
+            return self.addClauses(statement)
+
+        self.clauses += clauses
+        return True
+
+    def addReference(self, reference):
+        """
+        Stores the literal of a reference to a single bit like ~S0[3:3].
+        Returns False if it is not a reference to a single bit.
+        """
+        if reference in self.references:
+            return True
+        match = REFERENCE_REGEX.match(reference)
+        if match is None or match.group(2) not in self.variables:
+            return False
+        bits = self.variables[match.group(2)]
+        if match.group(3) is not None:
+            if match.group(3) != match.group(4):
+                return False
+            bits = bits[int(match.group(4)):int(match.group(4)) + 1]
+        if len(bits) != 1:
+            return False
+        self.references[reference] = -bits[0] if match.group(1) else bits[0]
+        return True
+
+    def evaluate(self, node):
+        """
+        Returns the literals of the bits of the expression, LSB first.
+        """
+        kind = node[0]
+        if kind == "var":
+            return self.variables[node[1]]
+        if kind == "const":
+            return node[1]
+        if kind == "extract":
+            return self.evaluate(node[1])[node[3]:node[2] + 1]
+        if kind == "concat":
+            return self.evaluate(node[2]) + self.evaluate(node[1])
+        if kind == "not":
+            return [-bit for bit in self.evaluate(node[1])]
+        if kind in ["and", "or", "BVXOR"]:
+            if kind == "BVXOR":
+                left, right = node[1]
+            else:
+                left, right = node[1:]
+            gate = {"and" : self.getAnd, "or" : self.getOr,
+                    "BVXOR" : self.getXor}[kind]
+            a, b = self.evaluateOperands(left, right)
+            return [gate(x, y) for x, y in zip(a, b)]
+        if kind == "shl":
+            return [FALSE] * node[2] + self.evaluate(node[1])
+        if kind == "shr":
+            bits = self.evaluate(node[1])
+            return bits[node[2]:] + [FALSE] * min(node[2], len(bits))
+        if kind == "ite":
+            condition = self.evaluateBit(node[1])
+            a, b = self.evaluateOperands(node[2], node[3])
+            return [self.getIte(condition, x, y) for x, y in zip(a, b)]
+        if kind == "BVPLUS":
+            width = getNumeral(node[1][0])
+            result = [FALSE] * width
+            for argument in node[1][1:]:
+                result = self.getSum(
+                    result, resize(self.evaluate(argument), width))
+            return result
+        if kind == "BVSUB":
+            width = getNumeral(node[1][0])
+            a = resize(self.evaluate(node[1][1]), width)
+            b = resize(self.evaluate(node[1][2]), width)
+            return self.getSum(a, [-bit for bit in b], TRUE)
+        if kind == "BVMOD":
+            # Only powers of two are used as modulus
+            width = getNumeral(node[1][0])
+            a = resize(self.evaluate(node[1][1]), width)
+            b = resize(self.evaluate(node[1][2]), width)
+            if b.count(TRUE) != 1 or b.count(FALSE) != width - 1:
+                print("ERROR: BVMOD is only supported for powers of two")
+                exit(1)
+            return resize(a[:b.index(TRUE)], width)
+        if kind in ["BVLE", "BVLT", "BVGE", "BVGT"]:
+            a, b = self.evaluateOperands(node[1][0], node[1][1])
+            if kind in ["BVGE", "BVGT"]:
+                a, b = b, a
+            return [self.getLessThan(a, b, kind in ["BVLE", "BVGE"])]
+        if kind == "eq":
+            a, b = self.evaluateOperands(node[1], node[2])
+            return [-self.getOrMany([self.getXor(x, y)
+                                     for x, y in zip(a, b)])]
+        if kind == "lnot":
+            return [-self.evaluateBit(node[1])]
+
+        print("ERROR: '{}' is not supported by the CNF backend".format(kind))
+        exit(1)
+
+    def evaluateBit(self, node):
+        """
+        Returns the literal of a formula or a single bit expression.
+        """
+        bits = self.evaluate(node)
+        assert(len(bits) == 1)
+        return bits[0]
+
+    def evaluateOperands(self, left, right):
+        """
+        Returns the bits of both expressions extended to the same width.
+        """
+        a = self.evaluate(left)
+        b = self.evaluate(right)
+        width = max(len(a), len(b))
+        return resize(a, width), resize(b, width)
+
+    def assertFormula(self, node):
+        """
+        Adds the constraint that the formula is true.
+        """
+        if node[0] == "eq":
+            self.assertEqual(node[1], node[2])
+        elif node[0] == "lnot" and node[1][0] == "eq":
+            self.assertNotEqual(node[1][1], node[1][2])
+        else:
+            self.addClause([self.evaluateBit(node)])
+        return
+
+    def assertEqual(self, left, right):
+        """
+        Adds the constraint left = right. Equalities between bits are
+        resolved by merging the variables.
+        """
+        if left[0] == "const":
+            left, right = right, left
+        if right[0] == "const" and left[0] == "var" and \
+           left[1] in self.assumed:
+            self.assumed_values[left[1]] = right[1]
+            return
+        if right[0] == "const":
+            self.assertValue(left, right[1])
+            return
+        a, b = self.evaluateOperands(left, right)
+        for x, y in zip(a, b):
+            self.merge(x, y)
+        return
+
+    def assertValue(self, node, value):
+        """
+        Adds the constraint that the expression is equal to the constant
+        value. Conjunctions and disjunctions are added as clauses.
+        """
+        if node[0] == "not":
+            self.assertValue(node[1], [-bit for bit in value])
+            return
+        if node[0] not in ["and", "or"]:
+            bits, value = self.evaluateOperands(node, ("const", value))
+            for x, y in zip(bits, value):
+                self.merge(x, y)
+            return
+
+        # a & b = 1 and a | b = 0 constrain each operand, the other cases are
+        # clauses over all operands
+        leaves = [self.evaluate(leaf) for leaf in self.getLeaves(node, node[0])]
+        width = max(len(value), max(len(bits) for bits in leaves))
+        value = resize(value, width)
+        leaves = [resize(bits, width) for bits in leaves]
+        constrained = TRUE if node[0] == "and" else FALSE
+        for i in range(width):
+            if value[i] == constrained:
+                for bits in leaves:
+                    self.merge(bits[i], constrained)
+            else:
+                self.addClause([-constrained * bits[i] for bits in leaves])
+        return
+
+    def assertNotEqual(self, left, right):
+        """
+        Adds the constraint left != right.
+        """
+        if left[0] == "const":
+            left, right = right, left
+        if right[0] == "const" and left[0] == "or" and \
+           all(bit == FALSE for bit in right[1]):
+            # Some bit of some operand is set
+            leaves = [self.evaluate(leaf) for leaf in self.getLeaves(left, "or")]
+            self.addClause([bit for bits in leaves for bit in bits])
+            return
+        a, b = self.evaluateOperands(left, right)
+        self.addClause([self.getXor(x, y) for x, y in zip(a, b)])
+        return
+
+    def getDIMACSClauses(self):
+        """
+        Returns the clauses as lists of DIMACS literals, where every
+        representative variable gets a new index.
+        """
+        representatives = [0] + [self.find(var)
+                                 for var in range(1, self.num_vars + 1)]
+        self.dimacs_vars = {}
+        dimacs_clauses = []
+        for clause in self.clauses:
+            literals = {representatives[literal] if literal > 0 else
+                        -representatives[-literal] for literal in clause}
+            literals.discard(FALSE)
+            if TRUE in literals or \
+               any(-literal in literals for literal in literals):
+                continue
+            if not literals:
+                self.unsatisfiable = True
+                break
+
+            dimacs_clause = []
+            for literal in literals:
+                index = self.dimacs_vars.get(abs(literal))
+                if index is None:
+                    index = len(self.dimacs_vars) + 1
+                    self.dimacs_vars[abs(literal)] = index
+                dimacs_clause.append(index if literal > 0 else -index)
+            dimacs_clauses.append(dimacs_clause)
+
+        if self.unsatisfiable:
+            return [[1], [-1]]
+        return dimacs_clauses
+
+    def getNumDIMACSVars(self):
+        """
+        Returns the number of variables of the DIMACS clauses.
+        """
+        return max(1, len(self.dimacs_vars))
+
+    def getDIMACS(self, sampling=False):
+        """
+        Returns the clauses in DIMACS format. If sampling is set, the bits
+        of the declared variables are given as sampling set, such that the
+        solutions are counted projected on them.
+        """
+        clauses = self.getDIMACSClauses()
+        sampling_set = self.getSamplingSet() if sampling else []
+        lines = ["p cnf {} {}\n".format(self.getNumDIMACSVars(),
+                                        len(clauses))]
+        for i in range(0, len(sampling_set), 10):
+            lines.append("c ind {} 0\n".format(
+                " ".join(map(str, sampling_set[i:i + 10]))))
+        lines.extend(" ".join(map(str, clause)) + " 0\n"
+                     for clause in clauses)
+        return "".join(lines)
+
+    def getAssumptions(self, name, value):
+        """
+        Returns the DIMACS literals which assume that the variable is equal
+        to value, or None if this contradicts the clauses. Has to be called
+        after getDIMACSClauses.
+        """
+        assumptions = []
+        for i, bit in enumerate(self.variables[name]):
+            literal = self.find(bit if (value >> i) & 1 else -bit)
+            if literal == FALSE:
+                return None
+            if literal == TRUE:
+                continue
+            index = self.dimacs_vars.get(abs(literal))
+            if index is None:
+                # The bit does not occur in any clause
+                index = len(self.dimacs_vars) + 1
+                self.dimacs_vars[abs(literal)] = index
+            assumptions.append(index if literal > 0 else -index)
+        return assumptions
+
+    def getBlockingClause(self, names, assignment):
+        """
+        Returns the DIMACS clause which excludes the values of the given
+        variables in the assignment. Bits which do not occur in any clause
+        are ignored.
+        """
+        clause = set()
+        for name in names:
+            for bit in self.variables[name]:
+                literal = self.find(bit)
+                index = self.dimacs_vars.get(abs(literal))
+                if abs(literal) == TRUE or index is None:
+                    continue
+                clause.add(-index if index in assignment else index)
+        return sorted(clause, key=abs)
+
+    def getSamplingSet(self):
+        """
+        Returns the DIMACS variables of the bits of all declared variables.
+        Bits which do not occur in any clause are unconstrained and left
+        out, like STP does. Has to be called after getDIMACSClauses.
+        """
+        sampling_set = set()
+        for bits in self.variables.values():
+            for bit in bits:
+                index = self.dimacs_vars.get(abs(self.find(bit)))
+                if index is not None:
+                    sampling_set.add(index)
+        return sorted(sampling_set)
+
+    def getValue(self, literal, assignment):
+        """
+        Returns the value of the literal for the set of true DIMACS
+        variables. Variables which do not occur in the CNF are false.
+        """
+        literal = self.find(literal)
+        if abs(literal) == TRUE:
+            value = True
+        else:
+            value = self.dimacs_vars.get(abs(literal)) in assignment
+        return value if literal > 0 else not value
+
+    def getSTPOutput(self, assignment):
+        """
+        Returns the values of all declared variables in the same format as
+        the counterexample printed by STP.
+        """
+        output = []
+        for name, bits in self.variables.items():
+            value = 0
+            for i, bit in enumerate(bits):
+                if self.getValue(bit, assignment):
+                    value |= 1 << i
+            if len(bits) % 4 == 0:
+                value = "0x{:0{}X}".format(value, len(bits) // 4)
+            else:
+                value = "0b{:0{}b}".format(value, len(bits))
+            output.append("ASSERT( {} = {} );\n".format(name, value))
+        return "".join(output)
+
+
+def resize(bits, width):
+    """
+    Truncates or zero extends the bits to the given width.
+    """
+    return bits[:width] + [FALSE] * (width - len(bits))
@@ -0,0 +1,202 @@
+'''
+Created on Oct 18, 2026
+
+Translates the STP models into SMT-LIB2, such that they can be solved by
+Boolector or any other SMT solver for the logic QF_BV without converting
+them with STP first.
+@author: stefan
+'''
+
+from parser.stpparser import STPParser, TRUE, getNumeral
+
+# Comparisons of unsigned bitvectors and the SMT-LIB2 function for them
+COMPARISONS = {"BVLE" : "bvule", "BVLT" : "bvult",
+               "BVGE" : "bvuge", "BVGT" : "bvugt"}
+
+
+class SMTModel(STPParser):
+    """
+    Translates the commands of an STP model into SMT-LIB2 commands.
+
+    Expressions are translated into pairs (term, width), where the width of
+    a formula is None. As in CVC, the operands of bitwise operations and
+    comparisons with different widths are zero extended.
+    """
+
+    def __init__(self):
+        STPParser.__init__(self)
+        # self.variables holds the width of each declared variable
+        self.commands = []
+        return
+
+    def addVariable(self, name, width):
+        """
+        Declares a bitvector of the given width.
+        """
+        self.variables[name] = width
+        self.commands.append("(declare-fun {} () (_ BitVec {}))\n".format(
+            name, width))
+        return
+
+    def addAssertion(self, statement):
+        """
+        Adds the formula of a command ASSERT(...).
+        """
+        formula = self.getFormula(self.translate(self.parseAssertion(statement)))
+        self.commands.append("(assert {})\n".format(formula))
+        return
+
+    def getSMTLIB2(self):
+        """
+        Returns the model as SMT-LIB2 script, which prints the values of all
+        declared variables if it is satisfiable.
+        """
+        return "".join(["(set-option :produce-models true)\n",
+                        "(set-logic QF_BV)\n"] + self.commands +
+                       ["(check-sat)\n", "(get-model)\n", "(exit)\n"])
+
+    def translate(self, node):
+        """
+        Returns the term and width of the expression.
+        """
+        kind = node[0]
+        if kind == "var":
+            return node[1], self.variables[node[1]]
+        if kind == "const":
+            return "#b" + "".join("1" if bit == TRUE else "0"
+                                  for bit in reversed(node[1])), len(node[1])
+        if kind == "extract":
+            term, _ = self.translate(node[1])
+            return "((_ extract {} {}) {})".format(node[2], node[3], term), \
+                   node[2] - node[3] + 1
+        if kind == "concat":
+            high, high_width = self.getBitvector(self.translate(node[1]))
+            low, low_width = self.getBitvector(self.translate(node[2]))
+            return "(concat {} {})".format(high, low), high_width + low_width
+        if kind == "not":
+            term, width = self.translate(node[1])
+            if width is None:
+                return "(not {})".format(term), None
+            return "(bvnot {})".format(term), width
+        if kind in ["and", "or"]:
+            operands = [self.translate(leaf)
+                        for leaf in self.getLeaves(node, kind)]
+            if all(width is None for _, width in operands):
+                return "({} {})".format(kind, " ".join(
+                    term for term, _ in operands)), None
+            return self.getBitwise("bv" + kind, operands)
+        if kind == "BVXOR":
+            return self.getBitwise("bvxor", [self.translate(argument)
+                                             for argument in node[1]])
+        if kind == "shl":
+            term, width = self.getBitvector(self.translate(node[1]))
+            if node[2] == 0:
+                return term, width
+            return "(concat {} #b{})".format(term, "0" * node[2]), \
+                   width + node[2]
+        if kind == "shr":
+            term, width = self.getBitvector(self.translate(node[1]))
+            if node[2] == 0:
+                return term, width
+            if node[2] >= width:
+                return "#b" + "0" * width, width
+            return "(concat #b{} ((_ extract {} {}) {}))".format(
+                "0" * node[2], width - 1, node[2], term), width
+        if kind == "ite":
+            condition = self.getFormula(self.translate(node[1]))
+            then_term, then_width = self.translate(node[2])
+            else_term, else_width = self.translate(node[3])
+            if then_width is None and else_width is None:
+                return "(ite {} {} {})".format(condition, then_term,
+                                               else_term), None
+            (then_term, else_term), width = self.getOperands(
+                [(then_term, then_width), (else_term, else_width)])
+            return "(ite {} {} {})".format(condition, then_term,
+                                           else_term), width
+        if kind in ["BVPLUS", "BVSUB", "BVMOD"]:
+            width = getNumeral(node[1][0])
+            terms = [self.resize(self.getBitvector(self.translate(argument)),
+                                 width) for argument in node[1][1:]]
+            if len(terms) == 1:
+                return terms[0], width
+            function = {"BVPLUS" : "bvadd", "BVSUB" : "bvsub",
+                        "BVMOD" : "bvurem"}[kind]
+            return "({} {})".format(function, " ".join(terms)), width
+        if kind in COMPARISONS:
+            (left, right), _ = self.getOperands([self.translate(argument)
+                                                 for argument in node[1]])
+            return "({} {} {})".format(COMPARISONS[kind], left, right), None
+        if kind == "eq":
+            left = self.translate(node[1])
+            right = self.translate(node[2])
+            if left[1] is None and right[1] is None:
+                return "(= {} {})".format(left[0], right[0]), None
+            (left, right), _ = self.getOperands([left, right])
+            return "(= {} {})".format(left, right), None
+        if kind == "lnot":
+            return "(not {})".format(
+                self.getFormula(self.translate(node[1]))), None
+
+        print("ERROR: '{}' is not supported by the SMT-LIB2 backend".format(
+            kind))
+        exit(1)
+
+    def getBitwise(self, function, operands):
+        """
+        Returns the bitwise operation on all operands extended to the same
+        width.
+        """
+        terms, width = self.getOperands(operands)
+        return "({} {})".format(function, " ".join(terms)), width
+
+    def getOperands(self, operands):
+        """
+        Returns the terms of the expressions zero extended to the same width
+        and the width.
+        """
+        operands = [self.getBitvector(operand) for operand in operands]
+        width = max(operand_width for _, operand_width in operands)
+        return [self.resize(operand, width) for operand in operands], width
+
+    def getBitvector(self, expression):
+        """
+        Returns a formula as bitvector of width one, bitvectors unchanged.
+        """
+        term, width = expression
+        if width is None:
+            return "(ite {} #b1 #b0)".format(term), 1
+        return term, width
+
+    def getFormula(self, expression):
+        """
+        Returns a bitvector of width one as formula, formulas unchanged.
+        """
+        term, width = expression
+        if width is None:
+            return term
+        if width != 1:
+            print("ERROR: Expected a formula but found a bitvector of width "
+                  "{}: {}".format(width, term[:80]))
+            exit(1)
+        return "(= {} #b1)".format(term)
+
+    def resize(self, expression, width):
+        """
+        Returns the term of the bitvector truncated or zero extended to the
+        given width.
+        """
+        term, term_width = expression
+        if term_width < width:
+            return "((_ zero_extend {}) {})".format(width - term_width, term)
+        if term_width > width:
+            return "((_ extract {} 0) {})".format(width - 1, term)
+        return term
+
+
+def getSMTLIB2(model):
+    """
+    Returns the STP model translated into SMT-LIB2.
+    """
+    smt_model = SMTModel()
+    smt_model.parseString(model)
+    return smt_model.getSMTLIB2()
@@ -0,0 +1,96 @@
+'''
+Created on Oct 18, 2026
+
+Compares Matsui's algorithm with the search on the STP models.
+@author: stefan
+'''
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from config import PATH_CRYPTOMINISAT
+from ciphers import gift, present
+from cryptanalysis import search
+from parser import stpcommands
+
+HAS_CRYPTOMINISAT = os.path.exists(os.path.join(REPO_PATH, PATH_CRYPTOMINISAT))
+
+
+def setUpModule():
+    # The paths in config.py are relative to the repository
+    os.chdir(REPO_PATH)
+
+
+def getParameters(rounds):
+    """
+    Returns the parameters of the search for a 64-bit SPN.
+    """
+    return {"rounds" : rounds,
+            "wordsize" : 64,
+            "blocksize" : 64,
+            "sweight" : 0,
+            "iterative" : False,
+            "fixedVariables" : {},
+            "blockedCharacteristics" : [],
+            "timelimit" : -1,
+            "dot" : None,
+            "latex" : None}
+
+
+def findOptimalTrailsMatsui(cipher, rounds):
+    """
+    Returns the minimal weights for 1 up to the given number of rounds
+    found with Matsui's algorithm.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        return search.findOptimalTrailsMatsui(cipher, getParameters(rounds))
+
+
+def hasCharacteristic(cipher, rounds, weight):
+    """
+    Returns True if the STP model has a characteristic with at most the
+    given weight.
+    """
+    parameters = getParameters(rounds)
+    parameters["sweight"] = weight
+    stpcommands.setExactWeight(False)
+    try:
+        model = search.generateModel(cipher, parameters)
+    finally:
+        stpcommands.setExactWeight(True)
+    return search.foundSolution(search.solveCNF(model))
+
+
+class TestMatsui(unittest.TestCase):
+
+    def testPresent(self):
+        self.assertEqual(findOptimalTrailsMatsui(present.PresentCipher(), 3),
+                         [2, 4, 8])
+
+    def testGift(self):
+        self.assertEqual(findOptimalTrailsMatsui(gift.GiftCipher(), 3),
+                         [2, 4, 7])
+
+    @unittest.skipUnless(HAS_CRYPTOMINISAT, "CryptoMiniSat is not installed")
+    def testPresentModel(self):
+        cipher = present.PresentCipher()
+        for rounds, weight in enumerate(findOptimalTrailsMatsui(cipher, 3), 1):
+            self.assertTrue(hasCharacteristic(cipher, rounds, weight))
+            self.assertFalse(hasCharacteristic(cipher, rounds, weight - 1))
+
+    @unittest.skipUnless(HAS_CRYPTOMINISAT, "CryptoMiniSat is not installed")
+    def testGiftModel(self):
+        cipher = gift.GiftCipher()
+        for rounds, weight in enumerate(findOptimalTrailsMatsui(cipher, 3), 1):
+            self.assertTrue(hasCharacteristic(cipher, rounds, weight))
+            self.assertFalse(hasCharacteristic(cipher, rounds, weight - 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
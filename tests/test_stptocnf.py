@@ -0,0 +1,106 @@
+'''
+Created on Oct 18, 2026
+
+Compares the CNF translation of the STP models with STP.
+@author: stefan
+'''
+
+import os
+import re
+import sys
+import unittest
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from config import PATH_STP, PATH_CRYPTOMINISAT
+from ciphers import gift, present, simon, speck
+from cryptanalysis import search
+
+HAS_CRYPTOMINISAT = os.path.exists(os.path.join(REPO_PATH, PATH_CRYPTOMINISAT))
+HAS_STP = os.path.exists(os.path.join(REPO_PATH, PATH_STP))
+
+
+def setUpModule():
+    # The paths in config.py are relative to the repository
+    os.chdir(REPO_PATH)
+
+
+def getParameters(rounds, wordsize, sweight):
+    """
+    Returns the parameters of a single search for a characteristic.
+    """
+    return {"rounds" : rounds,
+            "wordsize" : wordsize,
+            "blocksize" : 2 * wordsize,
+            "sweight" : sweight,
+            "iterative" : False,
+            "fixedVariables" : {},
+            "blockedCharacteristics" : []}
+
+
+def solveString(model):
+    """
+    Returns the values of the variables in the solution of the CNF
+    translation of the model, or None if it has no solution.
+    """
+    result = search.solveCNF(model)
+    if not search.foundSolution(result):
+        return None
+    return dict(re.findall(r"ASSERT\( (\w+) = (\w+) \);", result))
+
+
+@unittest.skipUnless(HAS_CRYPTOMINISAT, "CryptoMiniSat is not installed")
+class TestCNFModel(unittest.TestCase):
+
+    def assertMinWeight(self, cipher, rounds, wordsize, weight):
+        """
+        Checks that the model has a solution for the weight but none for
+        the weight below, with the CNF translation and with STP.
+        """
+        solvers = [search.solveCNF]
+        if HAS_STP:
+            solvers.append(lambda model: search.solveSTP(model, cache=False))
+        for solve in solvers:
+            for sweight, found in [(weight, True), (weight - 1, False)]:
+                parameters = getParameters(rounds, wordsize, sweight)
+                model = search.generateModel(cipher, parameters)
+                self.assertEqual(search.foundSolution(solve(model)), found,
+                                 "{} rounds with weight {}".format(rounds,
+                                                                   sweight))
+
+    def testSimon(self):
+        self.assertMinWeight(simon.SimonCipher(), 5, 16, 8)
+
+    def testSpeck(self):
+        self.assertMinWeight(speck.SpeckCipher(), 5, 16, 9)
+
+    def testPresent(self):
+        self.assertMinWeight(present.PresentCipher(), 1, 64, 2)
+        self.assertMinWeight(present.PresentCipher(), 2, 64, 4)
+
+    def testGift(self):
+        self.assertMinWeight(gift.GiftCipher(), 1, 64, 2)
+
+    def testArithmetic(self):
+        values = solveString("x, y, z: BITVECTOR(8);\n"
+                             "ASSERT(x = 0hexA7);\n"
+                             "ASSERT(BVPLUS(8, x, y) = 0hex05);\n"
+                             "ASSERT(z = BVXOR(x, y) | (x >> 3));\n")
+        self.assertEqual(int(values["y"], 16), (0x05 - 0xA7) % 256)
+        self.assertEqual(int(values["z"], 16), (0xA7 ^ 0x5E) | (0xA7 >> 3))
+
+    def testUnsatisfiable(self):
+        self.assertIsNone(solveString("x: BITVECTOR(4);\n"
+                                      "ASSERT(BVLT(x, 0hex3));\n"
+                                      "ASSERT(BVGT(x, 0hex2));\n"))
+
+    def testMergedVariables(self):
+        values = solveString("x, y: BITVECTOR(6);\n"
+                             "ASSERT(x = y);\n"
+                             "ASSERT(y = 0bin101101);\n")
+        self.assertEqual(int(values["x"], 2), 0b101101)
+
+
+if __name__ == "__main__":
+    unittest.main()